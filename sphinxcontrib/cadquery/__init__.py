@@ -13,7 +13,11 @@ from .cq_core import (
     LegacyCqSvgDirective,
     LegacyCqVtkDirective,
 )
+from .cqgi import Cqgi
 from .domain import CadQueryDomain, set_svg_image_uri
+from .packs import close_pack
+from .preview import add_preview_script, merge_models, purge_models, write_manifest
+from .views import shutdown_pool
 
 __version__ = "0.10.1"
 
@@ -25,6 +29,33 @@ _JS_FILES = {
 }
 
 
+def add_performance_overlay_script(app: Sphinx) -> None:
+    """Enable the VTK.js performance overlay on every page.
+
+    To be called on the Sphinx builder-inited event.
+    """
+
+    if app.config.cadquery_performance_overlay:
+        # before render.js, which reads the flag when loaded
+        app.add_js_file(
+            None, body="window.CADQUERY_PERFORMANCE_OVERLAY = true;", priority=50
+        )
+
+
+def add_browser_cache_script(app: Sphinx) -> None:
+    """Set the size of the browser geometry cache on every page.
+
+    To be called on the Sphinx builder-inited event.
+    """
+
+    cache_bytes = int(app.config.cadquery_browser_cache_size * 1048576)
+
+    # before render.js, which reads the size when loaded
+    app.add_js_file(
+        None, body=f"window.CADQUERY_GEOMETRY_CACHE_BYTES = {cache_bytes};", priority=50
+    )
+
+
 class ExtensionMetadata(TypedDict):
     """The metadata returned by this extension."""
 
@@ -61,6 +92,16 @@ def setup(app: Sphinx) -> ExtensionMetadata:
 
     app.add_domain(CadQueryDomain)
     app.connect("doctree-read", set_svg_image_uri)
+    app.connect("doctree-read", close_pack)
+    app.connect("doctree-read", Cqgi.clear_builds)
+    app.connect("builder-inited", add_preview_script)
+    app.connect("builder-inited", add_performance_overlay_script)
+    app.connect("builder-inited", add_browser_cache_script)
+    app.connect("env-purge-doc", purge_models)
+    app.connect("env-merge-info", merge_models)
+    app.connect("build-finished", write_manifest)
+    app.connect("build-finished", Cqgi.clear_builds)
+    app.connect("build-finished", shutdown_pool)
 
     app.add_directive("cadquery-svg", CqSvgDirective)
     app.add_directive("cadquery-vtk", CqVtkDirective)
@@ -69,6 +110,13 @@ def setup(app: Sphinx) -> ExtensionMetadata:
     app.add_directive("cadquery", LegacyCqVtkDirective)  # deprecated, use cadquery-vtk
 
     app.add_config_value("cadquery_include_source", True, "env")
+    app.add_config_value("cadquery_cache_backend", None, "")
+    app.add_config_value("cadquery_cache_mode", "read-write", "")
+    app.add_config_value("cadquery_export_pack", False, "env")
+    app.add_config_value("cadquery_live_preview", False, "env")
+    app.add_config_value("cadquery_live_preview_port", 8765, "html")
+    app.add_config_value("cadquery_performance_overlay", False, "html")
+    app.add_config_value("cadquery_browser_cache_size", 256, "html")
 
     return {
         "version": __version__,
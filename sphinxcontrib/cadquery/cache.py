@@ -0,0 +1,377 @@
+"""Export cache.
+
+Exports are stored under a key derived from everything that determines their
+content, so a cache filled by one build can be reused by any other build.
+"""
+
+import fcntl
+from abc import ABC, abstractmethod
+from collections.abc import Iterator
+from contextlib import contextmanager
+from hashlib import sha256
+from http.client import HTTPException
+from json import dumps
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+import cadquery
+from sphinx.application import Sphinx
+from sphinx.errors import ConfigError
+from sphinx.util import logging
+
+from .files import link_file, write_atomic, write_file
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT = 2
+"""Increment when the format of any cached export changes."""
+
+CACHE_MODES = ("read-write", "read-only")
+
+CACHE_ERRORS = (OSError, URLError, HTTPException)
+"""Backend errors treated as a cache miss, including truncated HTTP responses."""
+
+
+class CacheBackend(ABC):
+    """Export cache backend."""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the value stored under key, or None if not present."""
+
+    @abstractmethod
+    def set(self, key: str, value: bytes) -> None:
+        """Store value under key."""
+
+    def file(self, key: str) -> Optional[Path]:
+        """Local file storing key, or None if not stored in a local file."""
+
+        return None
+
+
+class LocalCacheBackend(CacheBackend):
+    """Cache backend storing one file per key in a local directory."""
+
+    def __init__(self, directory: Union[str, Path]) -> None:
+        """
+        Initialise backend.
+
+        :param directory: cache directory, created if it does not exist
+        """
+
+        self.directory = Path(directory)
+
+    def path(self, key: str) -> Path:
+        """Path name of the file storing key."""
+
+        return self.directory / key[:2] / key
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the value stored under key, or None if not present."""
+
+        try:
+            return self.path(key).read_bytes()
+        except FileNotFoundError:
+            return None
+
+    def set(self, key: str, value: bytes) -> None:
+        """Store value under key.
+
+        The value is renamed into place, so files linked to a previous value of
+        key are not changed.
+        """
+
+        write_atomic(self.path(key), value)
+
+    def file(self, key: str) -> Optional[Path]:
+        """Local file storing key, or None if not present."""
+
+        path_name = self.path(key)
+
+        return path_name if path_name.is_file() else None
+
+
+class SharedCacheBackend(LocalCacheBackend):
+    """Cache backend for a directory shared between concurrent builds.
+
+    Values are written to a temporary file and renamed into place, so readers
+    never observe a partial value. Writers of the same key are serialised with an
+    exclusive lock, and a key already stored by another writer is not rewritten.
+    """
+
+    @contextmanager
+    def lock(self, key: str) -> Iterator[None]:
+        """Hold an exclusive lock on key."""
+
+        lock_path = self.path(key).with_suffix(".lock")
+        lock_path.parent.mkdir(parents=True, exist_ok=True)
+
+        with lock_path.open("a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def set(self, key: str, value: bytes) -> None:
+        """Atomically store value under key."""
+
+        path_name = self.path(key)
+
+        with self.lock(key):
+            if path_name.is_file():
+                return
+
+            write_atomic(path_name, value, durable=True)
+
+
+class HttpCacheBackend(CacheBackend):
+    """Cache backend for an HTTP key/value store.
+
+    Values are fetched with ``GET <url>/<key>`` and stored with
+    ``PUT <url>/<key>``. A ``404`` response is a cache miss.
+    """
+
+    def __init__(self, url: str, *, timeout: float = 10) -> None:
+        """
+        Initialise backend.
+
+        :param url: base URL of the key/value store
+        :param timeout: timeout in seconds for each request
+        """
+
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Return the value stored under key, or None if not present."""
+
+        try:
+            with urlopen(f"{self.url}/{key}", timeout=self.timeout) as response:
+                return response.read()
+        except HTTPError as err:
+            if err.code == 404:
+                return None
+            raise
+
+    def set(self, key: str, value: bytes) -> None:
+        """Store value under key."""
+
+        request = Request(
+            f"{self.url}/{key}",
+            data=value,
+            headers={"Content-Type": "application/octet-stream"},
+            method="PUT",
+        )
+
+        with urlopen(request, timeout=self.timeout):
+            pass
+
+
+class Export:
+    """Export held in memory, or in a file of a local cache backend."""
+
+    def __init__(
+        self, text: Optional[str] = None, path_name: Optional[Path] = None
+    ) -> None:
+        """
+        Initialise export.
+
+        :param text: export content, if in memory
+        :param path_name: cache file storing the export
+        """
+
+        self._text = text
+        self.path_name = path_name
+
+    def text(self) -> str:
+        """Export content."""
+
+        if self._text is None:
+            self._text = self.path_name.read_text()  # type: ignore[union-attr]
+
+        return self._text
+
+    def materialise(self, destination: Path) -> None:
+        """Write export to destination, linking the cache file when possible.
+
+        An up to date destination is not rewritten.
+        """
+
+        if self.path_name is not None:
+            link_file(self.path_name, destination)
+        else:
+            write_file(destination, self.text().encode())
+
+
+class ExportCache:
+    """Export cache using a cache backend."""
+
+    def __init__(
+        self, backend: Optional[CacheBackend], mode: str = "read-write"
+    ) -> None:
+        """
+        Initialise export cache.
+
+        :param backend: cache backend, or None to disable caching
+        :param mode: either "read-write" or "read-only"
+        """
+
+        self.backend = backend
+        self.mode = mode
+
+    @staticmethod
+    def key(key_parts: dict[str, Any]) -> str:
+        """Cache key for the parts that determine an export."""
+
+        document = dumps(
+            {
+                "cache_format": CACHE_FORMAT,
+                "cadquery": getattr(cadquery, "__version__", None),
+                **key_parts,
+            },
+            sort_keys=True,
+        )
+
+        return sha256(document.encode()).hexdigest()
+
+    def get(self, key_parts: dict[str, Any]) -> Optional[str]:
+        """Return cached export, or None if not cached."""
+
+        if self.backend is None:
+            return None
+
+        key = self.key(key_parts)
+
+        try:
+            value = self.backend.get(key)
+            return None if value is None else value.decode()
+        except (*CACHE_ERRORS, UnicodeDecodeError) as err:
+            logger.warning(f"CadQuery export cache read failed for {key}: {err}")
+            return None
+
+    def set(self, key_parts: dict[str, Any], export: str) -> None:
+        """Cache export, unless read-only."""
+
+        if self.backend is None or self.mode != "read-write":
+            return
+
+        key = self.key(key_parts)
+
+        try:
+            self.backend.set(key, export.encode())
+        except CACHE_ERRORS as err:
+            logger.warning(f"CadQuery export cache write failed for {key}: {err}")
+
+    def get_or_create(
+        self, key_parts: dict[str, Any], create: Callable[[], str]
+    ) -> str:
+        """Return cached export, or create and cache it."""
+
+        export = self.get(key_parts)
+
+        if export is None:
+            export = create()
+            self.set(key_parts, export)
+
+        return export
+
+    def file(self, key_parts: dict[str, Any]) -> Optional[Path]:
+        """Local file storing cached export, or None."""
+
+        if self.backend is None:
+            return None
+
+        try:
+            return self.backend.file(self.key(key_parts))
+        except OSError:
+            return None
+
+    def get_or_create_export(
+        self, key_parts: dict[str, Any], create: Callable[[], str]
+    ) -> Export:
+        """Return cached export, or create and cache it.
+
+        An export stored in a local file is not read until its text is needed.
+        """
+
+        path_name = self.file(key_parts)
+
+        if path_name is not None:
+            return Export(path_name=path_name)
+
+        text = self.get_or_create(key_parts, create)
+
+        return Export(text, self.file(key_parts))
+
+
+def default_cache_directory(app: Sphinx) -> Path:
+    """Default directory of the local cache backend."""
+
+    return Path(app.doctreedir).joinpath("cadquery-cache")
+
+
+def cache_backend(
+    app: Sphinx, value: Union[None, str, CacheBackend]
+) -> Optional[CacheBackend]:
+    """Create cache backend from the cadquery_cache_backend config value."""
+
+    if value is None or isinstance(value, CacheBackend):
+        return value
+
+    if value.startswith(("http://", "https://")):
+        return HttpCacheBackend(value)
+
+    scheme, _, directory = value.partition(":")
+
+    if scheme == "local":
+        return LocalCacheBackend(directory or default_cache_directory(app))
+    elif scheme == "shared" and directory:
+        return SharedCacheBackend(directory)
+
+    raise ConfigError(f"invalid cadquery_cache_backend value {value!r}")
+
+
+def export_cache(app: Sphinx) -> ExportCache:
+    """Export cache configured for the Sphinx application."""
+
+    cache = getattr(app, "_sphinxcontrib_cadquery_export_cache", None)
+
+    if cache is None:
+        mode = app.config.cadquery_cache_mode
+
+        if mode not in CACHE_MODES:
+            raise ConfigError(
+                f"invalid cadquery_cache_mode value {mode!r}; "
+                f"must be one of {CACHE_MODES}"
+            )
+
+        cache = ExportCache(cache_backend(app, app.config.cadquery_cache_backend), mode)
+        setattr(app, "_sphinxcontrib_cadquery_export_cache", cache)
+
+    return cache
+
+
+def model_export_cache(app: Sphinx) -> ExportCache:
+    """Export cache for model files.
+
+    Model file exports are keyed by file content, so they are cached in the
+    default local directory when :confval:`cadquery_cache_backend` is not set.
+    """
+
+    cache = export_cache(app)
+
+    if cache.backend is not None:
+        return cache
+
+    model_cache = getattr(app, "_sphinxcontrib_cadquery_model_export_cache", None)
+
+    if model_cache is None:
+        model_cache = ExportCache(
+            LocalCacheBackend(default_cache_directory(app)), cache.mode
+        )
+        setattr(app, "_sphinxcontrib_cadquery_model_export_cache", model_cache)
+
+    return model_cache
@@ -1,3 +1,14 @@
 """Common configuration."""
 
 DEFAULT_COLOR = [1, 0.8, 0, 1]
+
+VIEWS = {
+    "front": (0, -1, 0),
+    "back": (0, 1, 0),
+    "left": (-1, 0, 0),
+    "right": (1, 0, 0),
+    "top": (0, 0, 1),
+    "bottom": (0, 0, -1),
+    "iso": (1, -1, 1),
+}
+"""Projection directions of named orthographic views."""
@@ -17,14 +17,19 @@ from typing import Any
 
 from cadquery import exporters
 from docutils import nodes
-from docutils.parsers.rst import directives
+from docutils.nodes import Node
+from docutils.parsers.rst import DirectiveError, directives
 from jinja2 import Environment, PackageLoader, select_autoescape
 from sphinx.util import logging
 from sphinx.util.docutils import SphinxDirective
 
+from .cache import export_cache
 from .common import DEFAULT_COLOR
 from .cqgi import Cqgi, VtkJsonExporter
-from .option_converters import rgba
+from .option_converters import rgba, view_names
+from .packs import pack_vtk_export
+from .preview import register_model
+from .views import export_views, svg_sheet
 
 logger = logging.getLogger(__name__)
 
@@ -33,52 +38,101 @@ _JINJA_ENV = Environment(
     autoescape=select_autoescape(),
 )
 
+_SVG_CLOSING_MARKUP = "</div>"
+_VTK_CLOSING_MARKUP = '</div>\n<div style="clear:both;"></div>'
 
-class CqSvgDirective(SphinxDirective, Cqgi):
+
+class CqCoreDirective(SphinxDirective, Cqgi):
+    """CadQuery core directive parent class."""
+
+    def container_nodes(
+        self, opening_html: str, closing_html: str, script_source: str
+    ) -> list[Node]:
+        """Wrap rendered HTML and optional source listing in raw HTML nodes.
+
+        Nodes are built directly rather than by inserting generated reST into the
+        state machine, so that embedded exports are not re-parsed by docutils.
+        """
+
+        result = [self.raw_html_node(opening_html)]
+
+        if self.config.cadquery_include_source:
+            code = script_source.strip("\n")
+            source_node = nodes.literal_block(code, code)
+            source_node["language"] = "python"
+            source_node["force"] = False
+            source_node["highlight_args"] = {}
+            self.set_source_info(source_node)
+            result.append(source_node)
+
+        result.append(self.raw_html_node(closing_html))
+
+        return result
+
+    def raw_html_node(self, html: str) -> Node:
+        """Raw HTML node."""
+
+        node = nodes.raw("", html, format="html")
+        self.set_source_info(node)
+
+        return node
+
+
+class CqSvgDirective(CqCoreDirective):
     """CadQuery SVG directive."""
 
     has_content = True
     required_arguments = 0
     optional_arguments = 0
-    option_spec = {}  # type: ignore[var-annotated]
+    option_spec = {"views": view_names}
 
-    def run(self) -> list[Any]:
+    def run(self) -> list[Node]:
         """Generate SVG render of CadQuery model."""
 
         self.assert_has_content()
         script_source = "\n".join(self.content)
+        views = self.options.get("views")
+        cache = export_cache(self.env.app)
+        key_parts = {"source": script_source, "select": None}
 
-        try:
+        def select_shape() -> Any:
             result = self.cqgi_parse(script_source)
+
+            try:
+                return result.first_result.shape
+            except AttributeError as err:
+                raise self.error(
+                    f"{err} Does your script source include a call to `show_object()`?"
+                )
+
+        try:
+            if views:
+                svg_document = svg_sheet(
+                    export_views(
+                        cache, {"export": "svg-view", **key_parts}, views, select_shape
+                    )
+                )
+            else:
+                svg_document = cache.get_or_create(
+                    {"export": "svg", **key_parts},
+                    lambda: exporters.getSVG(exporters.toCompound(select_shape())),
+                )
+        except DirectiveError:
+            raise
         except Exception as err:
             message = f"CQGI error in {self.name} directive: {err}."
             p = nodes.paragraph("", "", nodes.Text(message))
             self.state_machine.reporter.error(message)
             return [p]
 
-        try:
-            compound = exporters.toCompound(result.first_result.shape)
-        except AttributeError as err:
-            raise self.error(
-                f"{err} Does your script source include a call to `show_object()`?"
-            )
-
-        svg_document = exporters.getSVG(compound)
-
-        rst_markup = _JINJA_ENV.get_template("cadquery-svg.rst.jinja").render(
-            include_source=self.config.cadquery_include_source,
-            script_source=script_source,
+        html = _JINJA_ENV.get_template("cadquery-svg.html.jinja").render(
             svg_document=svg_document,
         )
 
-        self.state_machine.insert_input(
-            rst_markup.splitlines(), self.state_machine.input_lines.source(0)
-        )
-
-        return []
+        return self.container_nodes(html, _SVG_CLOSING_MARKUP, script_source)
 
 
-class CqVtkDirective(SphinxDirective, Cqgi):
+class CqVtkDirective(CqCoreDirective):
     """CadQuery VTK directive."""
 
     has_content = True
@@ -92,46 +146,68 @@ class CqVtkDirective(SphinxDirective, Cqgi):
         "width": directives.length_or_percentage_or_unitless,
     }
 
-    def run(self) -> list[Any]:
+    def run(self) -> list[Node]:
         """Generate VTK render of CadQuery model."""
 
         options = self.options
 
         script_source = self._script_source()
 
-        try:
+        select = options.get("select")
+        color = options.get("color", DEFAULT_COLOR)
+        model_id = None
+
+        if self.arguments:
+            model_id = register_model(
+                self, "script", self._script_path(), select=select, color=color
+            )
+
+        def export_vtk_json() -> str:
             result = self.cqgi_parse(script_source)
+            return VtkJsonExporter(result, select)(color=color)
+
+        try:
+            vtk_json = export_cache(self.env.app).get_or_create(
+                {
+                    "export": "vtk",
+                    "source": script_source,
+                    "select": select,
+                    "color": color,
+                },
+                export_vtk_json,
+            )
         except Exception as err:
             message = f"CQGI error in {self.name} directive: {err}."
             p = nodes.paragraph("", "", nodes.Text(message))
             self.state_machine.reporter.error(message)
             return [p]
 
-        color = options.get("color", DEFAULT_COLOR)
-        vtk_json = VtkJsonExporter(result, options.get("select", "result"))
+        if self.config.cadquery_export_pack:
+            vtk_json = pack_vtk_export(self.env.app, self.env.docname, vtk_json)
 
-        rst_markup = _JINJA_ENV.get_template("cadquery-vtk.rst.jinja").render(
-            include_source=self.config.cadquery_include_source,
-            script_source=script_source,
-            vtk_json=vtk_json(color=color),
+        html = _JINJA_ENV.get_template("cadquery-vtk.html.jinja").render(
+            vtk_json=vtk_json,
+            model_id=model_id,
             element="document.currentScript.parentNode",
             align=options.get("align", "none"),
             width=options.get("width", "100%"),
             height=options.get("height", "500px"),
         )
 
-        self.state_machine.insert_input(
-            rst_markup.splitlines(), self.state_machine.input_lines.source(0)
-        )
+        return self.container_nodes(html, _VTK_CLOSING_MARKUP, script_source)
+
+    def _script_path(self) -> Path:
+        """Get script path name from the first argument."""
+
+        path_name = Path(self.env.app.builder.srcdir) / self.arguments[0]
 
-        return []
+        return path_name.resolve()
 
     def _script_source(self):
         """Get script source."""
 
         if len(self.arguments):
-            path_name = Path(self.env.app.builder.srcdir) / self.arguments[0]
-            path_name = path_name.resolve()
+            path_name = self._script_path()
             if not path_name.is_file():
                 logger.error(f"File does not exist: {path_name}")
 
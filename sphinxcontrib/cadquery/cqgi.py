@@ -1,62 +1,242 @@
 """CadQuery CQGI utilities."""
 
+import re
+from hashlib import sha256
 from json import dumps
+from typing import Any, Optional
 
-from cadquery import Assembly, Color, Shape, Sketch, exporters
+from cadquery import Assembly, Color, Compound, Shape, Sketch, exporters
 from cadquery.cqgi import BuildResult  # type: ignore[attr-defined]
 from cadquery.cqgi import parse as cqgi_parse  # type: ignore[attr-defined]
 from cadquery.occ_impl.assembly import toJSON as cq_assembly_toJSON
 
 from .common import DEFAULT_COLOR
 
+_BUILDS: dict[str, BuildResult] = {}
+"""Build results of the document being read, keyed by script source."""
+
+
+def _build(script_source: str) -> BuildResult:
+    """Execute script source using CQGI."""
+
+    result = cqgi_parse(script_source).build()
+
+    if not result.success:
+        raise result.exception
+
+    return result
+
 
 class Cqgi:
     """Execute script source using CQGI."""
 
     @staticmethod
     def cqgi_parse(script_source: str) -> BuildResult:
-        """Execute script source using CQGI."""
+        """Execute script source using CQGI.
+
+        The build result is shared by every directive of a document rendering the
+        same script source, so a script is executed once per document however
+        many objects are exported from it.
+        """
+
+        if script_source not in _BUILDS:
+            _BUILDS[script_source] = _build(script_source)
 
-        result = cqgi_parse(script_source).build()
+        return _BUILDS[script_source]
+
+    @staticmethod
+    def clear_builds(*args: Any) -> None:
+        """Release shared build results.
 
-        if not result.success:
-            raise result.exception
+        To be called on the Sphinx doctree-read event, once the SVG images of a
+        document are exported, and on the build-finished event.
+        """
 
-        return result
+        _BUILDS.clear()
 
 
 class Exporter:
     """Exporter base class."""
 
+    SHOW_OBJECT_PREFIX = "show_object:"
+
+    @classmethod
+    def _select_shape(cls, result: BuildResult, select: Optional[str]):
+        """Select shape from CQGI result.
+
+        :param select: None to select the first object passed to ``show_object()``,
+            or else the ``result`` variable; or a comma separated list of
+            selectors, each one of:
+
+            * name of a variable in the CQGI environment;
+            * path of a named assembly child, ``assembly/child/grandchild``;
+            * ``show_object:<index>`` or ``show_object:<name>``, an object passed
+              to ``show_object()`` by position or by its ``name`` option.
+
+        :return: the selected object, or a dictionary of selected objects keyed by
+            selector if more than one selector is given
+        """
+
+        if select is None:
+            if result.first_result:
+                return result.first_result.shape
+
+            return cls._env(result)["result"]
+
+        selectors = [selector.strip() for selector in select.split(",")]
+
+        if len(selectors) == 1:
+            return cls._select_one(result, selectors[0])
+
+        return {selector: cls._select_one(result, selector) for selector in selectors}
+
+    @classmethod
+    def _select_one(cls, result: BuildResult, selector: str):
+        """Select one object from CQGI result."""
+
+        if selector.startswith(cls.SHOW_OBJECT_PREFIX):
+            return cls._select_shown(
+                result, selector.removeprefix(cls.SHOW_OBJECT_PREFIX)
+            )
+
+        name, *children = selector.split("/")
+
+        try:
+            shape = cls._env(result)[name]
+            for child in children:
+                shape = shape.objects[child]
+        except (AttributeError, KeyError):
+            raise ValueError(f"no object selected by {selector!r}")
+
+        return shape
+
+    @staticmethod
+    def _env(result: BuildResult) -> dict[str, Any]:
+        """Variables of the CQGI script.
+
+        ``env`` is assigned by ``CQModel.build()`` rather than declared by
+        ``BuildResult``, so it is looked up in the instance dictionary.
+        """
+
+        return vars(result)["env"]
+
     @staticmethod
-    def _select_shape(result: BuildResult, select: str):
-        """Select shape from CQGI environment."""
+    def _select_shown(result: BuildResult, key: str):
+        """Select object passed to show_object() by position or name."""
 
-        if result.first_result:
-            return result.first_result.shape
+        if key.isdigit():
+            try:
+                return result.results[int(key)].shape
+            except IndexError:
+                raise ValueError(f"no show_object() call at index {key}")
 
-        return result.env[select]
+        for shape_result in result.results:
+            if (shape_result.options or {}).get("name") == key:
+                return shape_result.shape
+
+        raise ValueError(f"no object shown with name {key!r}")
 
 
 class VtkJsonExporter(Exporter):
-    """Export CadQuery assembly as VTK.js JSON."""
+    """Export CadQuery assembly as VTK.js JSON.
+
+    The export is an object with the overall ``bounds`` of the assembly, a list of
+    ``parts`` and a list of ``shapes``. Each part carries its bounding box and
+    triangle count so that a viewer can place the camera and show placeholders
+    before any geometry has been parsed. ``shapes[i]`` is the VTK XML PolyData
+    of ``parts[i]``.
+    """
 
-    def __init__(self, result: BuildResult, select: str):
+    _NUMBER_OF_POLYS = re.compile(r'NumberOfPolys="(\d+)"')
+
+    def __init__(self, result: BuildResult, select: Optional[str]):
         self.result = result
         self.select = select
 
     def __call__(self, *, color=None):
         """Export CadQuery assembly as VTK.js JSON."""
 
+        shape = self._select_shape(self.result, self.select)
+
+        return self.export_shape(shape, color=color)
+
+    @classmethod
+    def export_shape(cls, shape, *, color=None) -> str:
+        """Export CadQuery object as VTK.js JSON."""
+
         if color is None:
             color = DEFAULT_COLOR
 
-        shape = self._select_shape(self.result, self.select)
-        assembly = self._to_assembly(shape, color=color)
-        vtk_json = dumps(cq_assembly_toJSON(assembly), separators=(",", ":"))
+        if isinstance(shape, dict):
+            assembly = Assembly()
+            for name, obj in shape.items():
+                assembly.add(cls._to_assembly(obj, color=color), name=name)
+        else:
+            assembly = cls._to_assembly(shape, color=color)
+        vtk_json = dumps(cls._to_payload(assembly), separators=(",", ":"))
 
         return vtk_json
 
+    @classmethod
+    def _to_payload(cls, assembly: Assembly) -> dict[str, Any]:
+        """Split assembly JSON into part summaries and shapes."""
+
+        parts = []
+        shapes = []
+        assembly_bounds: Optional[list[float]] = None
+
+        for (shape, _, location, _), part in zip(
+            assembly, cq_assembly_toJSON(assembly)
+        ):
+            bounds = cls._bounds(shape.moved(location))
+            assembly_bounds = cls._union_bounds(assembly_bounds, bounds)
+
+            shapes.append(part.pop("shape"))
+            parts.append(
+                {
+                    **part,
+                    "bounds": bounds,
+                    "hash": sha256(shapes[-1].encode()).hexdigest(),
+                    "triangles": cls._triangle_count(shapes[-1]),
+                }
+            )
+
+        return {
+            "bounds": assembly_bounds,
+            "parts": parts,
+            "shapes": shapes,
+        }
+
+    @staticmethod
+    def _bounds(shape: Shape) -> list[float]:
+        """Bounding box in VTK order (xmin, xmax, ymin, ymax, zmin, zmax)."""
+
+        bb = shape.BoundingBox()
+
+        return [bb.xmin, bb.xmax, bb.ymin, bb.ymax, bb.zmin, bb.zmax]
+
+    @staticmethod
+    def _union_bounds(bounds: Optional[list[float]], other: list[float]) -> list[float]:
+        """Union of two bounding boxes in VTK order."""
+
+        if bounds is None:
+            return list(other)
+
+        return [
+            min(bounds[0], other[0]),
+            max(bounds[1], other[1]),
+            min(bounds[2], other[2]),
+            max(bounds[3], other[3]),
+            min(bounds[4], other[4]),
+            max(bounds[5], other[5]),
+        ]
+
+    @classmethod
+    def _triangle_count(cls, vtk_xml: str) -> int:
+        """Count polygons declared in the pieces of a VTK XML PolyData document."""
+
+        return sum(int(count) for count in cls._NUMBER_OF_POLYS.findall(vtk_xml))
+
     @staticmethod
     def _to_assembly(shape: Shape, color: list[float]) -> Assembly:
         """Convert shape to assembly."""
@@ -72,12 +252,12 @@ class VtkJsonExporter(Exporter):
 class SvgExporter(Exporter):
     """Export CadQuery object as SVG."""
 
-    def __init__(self, result: BuildResult, select: str) -> None:
+    def __init__(self, result: BuildResult, select: Optional[str]) -> None:
         """
         Initialise exporter.
 
         :param result: CQGI result
-        :param select: name of object to select from CQGI result
+        :param select: selector of object from CQGI result
         """
 
         self.result = result
@@ -87,6 +267,31 @@ class SvgExporter(Exporter):
         """Export CadQuery object as SVG."""
 
         shape = self._select_shape(self.result, self.select)
-        compound = exporters.toCompound(shape)
 
-        return exporters.getSVG(compound)
+        return self.export_shape(shape)
+
+    @staticmethod
+    def export_shape(shape) -> str:
+        """Export CadQuery object as SVG."""
+
+        return exporters.getSVG(SvgExporter.to_compound(shape))
+
+    @classmethod
+    def to_compound(cls, shape) -> Shape:
+        """Convert selected object, or dictionary of objects, to a shape."""
+
+        if isinstance(shape, dict):
+            return Compound.makeCompound([cls._to_shape(obj) for obj in shape.values()])
+
+        return cls._to_shape(shape)
+
+    @staticmethod
+    def _to_shape(obj) -> Shape:
+        """Convert shape, assembly or workplane to a shape."""
+
+        if isinstance(obj, Shape):
+            return obj
+        elif isinstance(obj, Assembly):
+            return obj.toCompound()
+
+        return exporters.toCompound(obj)
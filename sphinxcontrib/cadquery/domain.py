@@ -2,8 +2,9 @@
 
 from base64 import b64encode
 from hashlib import sha1
+from json import dumps
 from pathlib import Path
-from typing import Any, Optional, Union
+from typing import Any, Callable, Optional, Union
 
 from docutils import nodes
 from docutils.nodes import Node
@@ -14,9 +15,21 @@ from sphinx.domains import Domain
 from sphinx.util import logging
 from sphinx.util.docutils import SphinxDirective
 
+from .cache import Export, ExportCache, export_cache, model_export_cache
 from .common import DEFAULT_COLOR
 from .cqgi import Cqgi, SvgExporter, VtkJsonExporter
-from .option_converters import horizontal_align, rgba, yes_no
+from .files import file_sha256
+from .model_files import MODEL_FILE_IMPORTERS, import_model
+from .option_converters import (
+    horizontal_align,
+    rgba,
+    view_layout,
+    view_names,
+    yes_no,
+)
+from .packs import pack_export, pack_vtk_export
+from .preview import register_model
+from .views import export_views, svg_sheet
 
 logger = logging.getLogger(__name__)
 
@@ -43,6 +56,8 @@ def set_svg_image_uri(app: Sphinx, doctree: Any) -> None:
     To be called on the Sphinx doctree-read event.
     """
 
+    view_documents: dict[Any, dict[str, str]] = {}
+
     for img in doctree.traverse(nodes.image):
         if not hasattr(img, "cadquery"):
             continue
@@ -50,7 +65,9 @@ def set_svg_image_uri(app: Sphinx, doctree: Any) -> None:
         context = img.cadquery["context"]
 
         try:
-            svg_document = export_svg(img.cadquery["source"], img.cadquery["select"])
+            svg_export, export_name_source = svg_image_export(
+                app, img.cadquery, view_documents
+            )
         except Exception as err:
             error_text = f"CQGI error in {context['name']} directive {err}: "
             detail_text = f"{img.source} on line {context['source_node_line']}."
@@ -61,18 +78,18 @@ def set_svg_image_uri(app: Sphinx, doctree: Any) -> None:
             continue
 
         if img.cadquery["inline-uri"]:
-            svg_bytes = b64encode(svg_document.encode("ascii"))
+            svg_bytes = b64encode(svg_export.text().encode("ascii"))
             img["uri"] = f"data:image/svg+xml;base64,{svg_bytes.decode('ascii')}"
+        elif app.config.cadquery_export_pack:
+            img.replace_self(pack_image_node(app, img, svg_export.text()))
         else:
             output_pathname = (
                 Path(app.builder.outdir)
                 .joinpath("_static")
                 .joinpath("cadquery-exports")
-                .joinpath(export_file_name(img.cadquery["source"]))
+                .joinpath(export_file_name(export_name_source))
             )
-            output_pathname.parent.mkdir(parents=True, exist_ok=True)
-
-            output_pathname.write_text(svg_document)
+            svg_export.materialise(output_pathname)
 
             doc_name_absolute = Path(app.srcdir) / Path(app.builder.env.docname)
             doc_depth = len(doc_name_absolute.parent.relative_to(app.srcdir).parts)
@@ -85,6 +102,26 @@ def set_svg_image_uri(app: Sphinx, doctree: Any) -> None:
             img["uri"] = uri.as_posix()
 
 
+def pack_image_node(app: Sphinx, img: nodes.image, svg_document: str) -> Node:
+    """Image fetched from the pack file of the document."""
+
+    export = pack_export(app, app.builder.env.docname, svg_document)
+    image_element = _JINJA_ENV.get_template("pack-image.html.jinja").render(
+        alt=img.get("alt", ""), export=export
+    )
+
+    return nodes.raw("", image_element, format="html")
+
+
+def _is_whole_file(path_name: str, source: str) -> bool:
+    """Whether source is the whole content of a file."""
+
+    try:
+        return Path(path_name).read_text().strip("\n") == source.strip("\n")
+    except (OSError, UnicodeDecodeError):
+        return False
+
+
 def export_file_name(source: str) -> Path:
     """Create file name for CadQuery export."""
 
@@ -93,19 +130,81 @@ def export_file_name(source: str) -> Path:
     return Path(source_hash).with_suffix(".svg")
 
 
-def export_svg(source: str, select: str) -> str:
-    """Export SVG document."""
+def svg_export_source(
+    app: Sphinx, cadquery: dict[str, Any]
+) -> tuple[ExportCache, dict[str, Any], Callable[[], Any]]:
+    """Export cache, cache key parts and shape selector for an SVG image."""
 
-    try:
-        parser = Cqgi()
-        result = parser.cqgi_parse(source)
-    except Exception as err:
-        raise err
+    if cadquery["model"]:
+        model_path = Path(cadquery["model"])
+
+        return (
+            model_export_cache(app),
+            {"model": file_sha256(model_path)},
+            lambda: import_model(model_path),
+        )
+
+    source = cadquery["source"]
+    select = cadquery["select"]
+
+    return (
+        export_cache(app),
+        {"source": source, "select": select},
+        lambda: SvgExporter._select_shape(Cqgi.cqgi_parse(source), select),
+    )
+
+
+def svg_image_export(
+    app: Sphinx, cadquery: dict[str, Any], view_documents: dict[Any, dict[str, str]]
+) -> tuple[Export, str]:
+    """Export SVG document for an image.
+
+    Views requested by the same directive are exported together, and shared
+    between its images through view_documents.
+
+    :return: SVG export, and source of its export file name, the cache key of the
+        export so that images differing only by selected object or view are
+        written to different files
+    """
+
+    cache, key_parts, select_shape = svg_export_source(app, cadquery)
+    views = cadquery.get("views")
+
+    if not views:
+        svg_key_parts = {"export": "svg", **key_parts}
+        svg_export = cache.get_or_create_export(
+            svg_key_parts, lambda: SvgExporter.export_shape(select_shape())
+        )
+
+        return svg_export, ExportCache.key(svg_key_parts)
+
+    group = (dumps(key_parts, sort_keys=True), views)
 
-    exporter = SvgExporter(result, select)
-    svg_document = exporter()
+    view_key_parts = {"export": "svg-view", **key_parts}
 
-    return svg_document
+    if group not in view_documents:
+        view_documents[group] = export_views(cache, view_key_parts, views, select_shape)
+
+    if cadquery.get("view"):
+        view = cadquery["view"]
+        view_export = Export(
+            view_documents[group][view], cache.file({**view_key_parts, "view": view})
+        )
+
+        return view_export, ExportCache.key({**view_key_parts, "view": view})
+
+    return (
+        Export(svg_sheet(view_documents[group])),
+        ExportCache.key({"export": "svg-sheet", **key_parts, "views": views}),
+    )
+
+
+class ContentError(Exception):
+    """Unexpected directive content."""
+
+    def __init__(self, system_message: Node) -> None:
+        super().__init__()
+        self.system_message = system_message
 
 
 class CqDirective(SphinxDirective, Cqgi):
@@ -114,6 +213,7 @@ class CqDirective(SphinxDirective, Cqgi):
     msg_caption_node = "First node must be either a paragraph or empty comment."
     msg_source_node = "Second node must be either a code-block or literalinclude."
     msg_two_or_more = "Directive {name} must be composed of 2 or more nodes."
+    msg_model_file = "Argument must be the path name of a STEP, BREP or STL file."
 
     def unexpected_content_error(self, message: Optional[str] = None) -> Any:
         """Unexpected content error."""
@@ -133,6 +233,66 @@ class CqDirective(SphinxDirective, Cqgi):
 
         return error
 
+    def model_file(self) -> Optional[Path]:
+        """Model file given as the directive argument.
+
+        The file is recorded as a dependency of the current document.
+        """
+
+        if not self.arguments:
+            return None
+
+        rel_filename, filename = self.env.relfn2path(self.arguments[0])
+        path_name = Path(filename)
+
+        if path_name.suffix.lower() not in MODEL_FILE_IMPORTERS:
+            raise self.error(
+                f"{self.msg_model_file} "
+                f"Supported suffixes: {', '.join(sorted(MODEL_FILE_IMPORTERS))}."
+            )
+
+        if not path_name.is_file():
+            raise self.error(f"Model file does not exist: {path_name}")
+
+        self.env.note_dependency(rel_filename)
+
+        return path_name
+
+    def split_content(
+        self, *, expect_source: bool = True
+    ) -> tuple[Optional[Node], Optional[Node], Optional[list[Node]]]:
+        """Split directive content into caption, source and notes nodes.
+
+        When a model file is given there is no source node, and content is
+        optional.
+        """
+
+        node = nodes.Element()  # anonymous container for parsing
+        self.state.nested_parse(self.content, self.content_offset, node)
+
+        caption_node = None
+        source_node = None
+        notes_start = 1
+
+        if expect_source and len(node) < 2:
+            raise ContentError(self.unexpected_content_error())
+
+        if len(node) and isinstance(node[0], nodes.paragraph):
+            caption_node = node[0]
+        elif len(node) and not isinstance(node[0], nodes.comment):
+            raise ContentError(self.unexpected_content_error(self.msg_caption_node))
+
+        if expect_source:
+            if not isinstance(node[1], nodes.literal_block):
+                raise ContentError(self.unexpected_content_error(self.msg_source_node))
+
+            source_node = node[1]
+            notes_start = 2
+
+        notes_nodes = node[notes_start:] if len(node) > notes_start else None
+
+        return caption_node, source_node, notes_nodes
+
     @staticmethod
     def include_source(option_value: Optional[str], config_value: bool) -> bool:
         """Determine if source code listing should be included in output."""
@@ -182,7 +342,8 @@ class CqSvgDirective(CqDirective):
     """
 
     required_arguments = 0
-    optional_arguments = 0
+    optional_arguments = 1
+    final_argument_whitespace = True
 
     option_spec = {
         "align": horizontal_align,
@@ -193,6 +354,8 @@ class CqSvgDirective(CqDirective):
         "inline-uri": directives.flag,
         "name": directives.unchanged,
         "select": directives.unchanged,
+        "view-layout": view_layout,
+        "views": view_names,
     }
     has_content = True
 
@@ -214,9 +377,6 @@ class CqSvgDirective(CqDirective):
             include_source_value, self.config.cadquery_include_source
         )
 
-        caption_node = None
-        notes_nodes = None
-
         figure_node = nodes.figure()
         self.add_name(figure_node)
 
@@ -228,49 +388,50 @@ class CqSvgDirective(CqDirective):
         if align:
             figure_node["align"] = align
 
-        node = nodes.Element()  # anonymous container for parsing
-        self.state.nested_parse(self.content, self.content_offset, node)
+        model_path = self.model_file()
 
-        if len(node) < 2:
-            return [figure_node, self.unexpected_content_error()]
+        try:
+            caption_node, source_node, notes_nodes = self.split_content(
+                expect_source=model_path is None
+            )
+        except ContentError as err:
+            return [figure_node, err.system_message]
 
-        if isinstance(node[0], nodes.paragraph):
-            caption_node = node[0]
-        elif not isinstance(node[0], nodes.comment):
-            return [
-                figure_node,
-                self.unexpected_content_error(self.msg_caption_node),
-            ]
+        source = source_node.astext() if source_node else ""
+        views = self.options.get("views")
 
-        if isinstance(node[1], nodes.literal_block):
-            source_node = node[1]
-            source = node[1].astext()
+        if views and self.options.get("view-layout") == "separate":
+            image_views: tuple[Optional[str], ...] = views
         else:
-            return [
-                figure_node,
-                self.unexpected_content_error(self.msg_source_node),
-            ]
-
-        if len(node) >= 3:
-            notes_nodes = node[2:]
-
-        image_node = nodes.image(source, alt=alt, uri="data:image/svg+xml;")
-
-        if isinstance(image_node, nodes.system_message):
-            return [image_node]
-
-        image_node.cadquery = {
-            "context": {
-                "source_node_line": source_node.line,
-            },
-            "inline-uri": inline_uri,
-            "select": self.options.get("select", "result"),
-            "source": source,
-        }
+            image_views = (None,)
 
         view_container = nodes.container()
         view_container["classes"].extend(["cadquery-container-model"])
-        view_container += image_node
+
+        for view in image_views:
+            image_alt = f"{alt} {view.capitalize()} view." if view else alt
+            image_node = nodes.image(source, alt=image_alt, uri="data:image/svg+xml;")
+
+            if isinstance(image_node, nodes.system_message):
+                return [image_node]
+
+            image_node.cadquery = {
+                "context": {
+                    "name": self.name,
+                    "source_node_line": (
+                        source_node.line if source_node else self.lineno
+                    ),
+                },
+                "inline-uri": inline_uri,
+                "model": str(model_path) if model_path else None,
+                "select": self.options.get("select"),
+                "source": source,
+                "view": view,
+                "views": views,
+            }
+
+            view_container += image_node
+
         view_container += self.svg_overlay_node()
 
         figure_node += view_container
@@ -301,7 +462,8 @@ class CqVtkDirective(CqDirective):
     """
 
     required_arguments = 0
-    optional_arguments = 0
+    optional_arguments = 1
+    final_argument_whitespace = True
 
     option_spec = {
         "align": horizontal_align,
@@ -328,9 +490,6 @@ class CqVtkDirective(CqDirective):
             include_source_value, self.config.cadquery_include_source
         )
 
-        caption_node = None
-        notes_nodes = None
-
         figure_node = nodes.figure()
         self.add_name(figure_node)
 
@@ -342,33 +501,22 @@ class CqVtkDirective(CqDirective):
         if align:
             figure_node["align"] = align
 
-        node = nodes.Element()  # anonymous container for parsing
-        self.state.nested_parse(self.content, self.content_offset, node)
-
-        if len(node) < 2:
-            return [figure_node, self.unexpected_content_error()]
+        model_path = self.model_file()
 
-        if isinstance(node[0], nodes.paragraph):
-            caption_node = node[0]
-        elif not isinstance(node[0], nodes.comment):
-            return [
-                figure_node,
-                self.unexpected_content_error(self.msg_caption_node),
-            ]
+        try:
+            caption_node, source_node, notes_nodes = self.split_content(
+                expect_source=model_path is None
+            )
+        except ContentError as err:
+            return [figure_node, err.system_message]
 
-        if isinstance(node[1], nodes.literal_block):
-            source_node = node[1]
-            source = node[1].astext()
+        if model_path is None:
+            assert source_node is not None  # split_content expected a source node
+            figure_node += self.vtk_container_node(
+                source_node.astext(), height, script_path=source_node.get("source")
+            )
         else:
-            return [
-                figure_node,
-                self.unexpected_content_error(self.msg_source_node),
-            ]
-
-        if len(node) >= 3:
-            notes_nodes = node[2:]
-
-        figure_node += self.vtk_container_node(source, height)
+            figure_node += self.model_vtk_container_node(model_path, height)
 
         figure_node = self.populate_figure_node(
             figure_node,
@@ -380,26 +528,84 @@ class CqVtkDirective(CqDirective):
 
         return [figure_node]
 
-    def vtk_container_node(self, source: str, height: str):
-        """VTK.js model container."""
+    def vtk_container_node(
+        self, source: str, height: str, *, script_path: Optional[str] = None
+    ):
+        """VTK.js model container.
 
-        try:
-            result = self.cqgi_parse(source)
-        except Exception as err:
-            error_text = f"CQGI error in {self.name} directive: "
-            detail_text = f"{err}."
+        :param script_path: path name of the file a literalinclude source was read
+            from; registers the model for live preview if the listing is the whole
+            file
+        """
 
-            logger.error(error_text + detail_text)
+        select = self.options.get("select")
+        color = self.options.get("color", DEFAULT_COLOR)
+        model_id = None
 
-            return [error_node(error_text, detail_text)]
+        if script_path and _is_whole_file(script_path, source):
+            model_id = register_model(
+                self, "script", Path(script_path), select=select, color=color
+            )
+
+        def export_vtk_json() -> str:
+            result = self.cqgi_parse(source)
+            return VtkJsonExporter(result, select)(color=color)
+
+        return self.render_vtk_container(
+            export_cache(self.env.app),
+            {"export": "vtk", "source": source, "select": select, "color": color},
+            export_vtk_json,
+            height,
+            model_id=model_id,
+        )
+
+    def model_vtk_container_node(self, model_path: Path, height: str):
+        """VTK.js model container for a model file."""
 
-        vtk_json = VtkJsonExporter(result, self.options.get("select", "result"))
         color = self.options.get("color", DEFAULT_COLOR)
+        model_id = register_model(self, "model", model_path, color=color)
+
+        def export_vtk_json() -> str:
+            shape = import_model(model_path)
+            return VtkJsonExporter.export_shape(shape, color=color)
+
+        try:
+            model_hash = file_sha256(model_path)
+        except OSError as err:
+            return self.vtk_error_node(err)
+
+        return self.render_vtk_container(
+            model_export_cache(self.env.app),
+            {"export": "vtk", "model": model_hash, "color": color},
+            export_vtk_json,
+            height,
+            model_id=model_id,
+        )
+
+    def render_vtk_container(
+        self,
+        cache: ExportCache,
+        key_parts: dict[str, Any],
+        export: Callable[[], str],
+        height: str,
+        *,
+        model_id: Optional[str] = None,
+    ):
+        """Render VTK.js model container using an export cache."""
+
+        try:
+            vtk_json = cache.get_or_create(key_parts, export)
+        except Exception as err:
+            return self.vtk_error_node(err)
+
+        if self.config.cadquery_export_pack:
+            vtk_json = pack_vtk_export(self.env.app, self.env.docname, vtk_json)
 
         script_element = _JINJA_ENV.get_template("vtk-container.html.jinja").render(
             element="document.currentScript.parentNode",
             height=height,
-            vtk_json=vtk_json(color=color),
+            model_id=model_id,
+            vtk_json=vtk_json,
         )
         vtk_script_node = nodes.raw("", script_element, format="html")
 
@@ -409,6 +615,16 @@ class CqVtkDirective(CqDirective):
 
         return view_container
 
+    def vtk_error_node(self, err: Exception) -> list[Node]:
+        """Log export error and return error node."""
+
+        error_text = f"CQGI error in {self.name} directive: "
+        detail_text = f"{err}."
+
+        logger.error(error_text + detail_text)
+
+        return [error_node(error_text, detail_text)]
+
 
 class CadQueryDomain(Domain):
     """CadQuery Sphinx domain."""
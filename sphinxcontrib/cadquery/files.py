@@ -0,0 +1,121 @@
+"""File utilities.
+
+Exports are materialised in the output directory without rewriting files that
+are already up to date. Files from a local export cache are hard linked, or
+reflinked where the filesystem supports it, instead of being copied.
+"""
+
+import fcntl
+import mmap
+import os
+import secrets
+import shutil
+from hashlib import sha256
+from pathlib import Path
+
+_FICLONE = 0x40049409
+"""Linux ioctl sharing the blocks of one file with another (reflink)."""
+
+
+def file_sha256(path_name: Path) -> str:
+    """SHA-256 hash of file content, read through a memory map."""
+
+    with path_name.open("rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return sha256().hexdigest()
+
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return sha256(mapped).hexdigest()
+
+
+def write_atomic(path_name: Path, value: bytes, *, durable: bool = False) -> None:
+    """Write a temporary file and rename it into place.
+
+    Readers never observe a partial file, and files hard linked to the previous
+    content are left unchanged.
+
+    :param durable: flush the file to storage before renaming it
+    """
+
+    path_name.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path_name.with_name(f".{path_name.name}.{secrets.token_hex(8)}")
+
+    # unlike mkstemp, permissions follow the umask, as for any other output file
+    file_descriptor = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+
+    try:
+        with os.fdopen(file_descriptor, "wb") as temp_file:
+            temp_file.write(value)
+            if durable:
+                temp_file.flush()
+                os.fsync(temp_file.fileno())
+        os.replace(temp_path, path_name)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+
+def write_file(path_name: Path, value: bytes) -> None:
+    """Write value, unless the file already has the same content."""
+
+    try:
+        if (
+            path_name.stat().st_size == len(value)
+            and file_sha256(path_name) == sha256(value).hexdigest()
+        ):
+            return
+    except FileNotFoundError:
+        pass
+
+    write_atomic(path_name, value)
+
+
+def link_file(source: Path, destination: Path) -> None:
+    """Materialise source at destination without copying its content if possible.
+
+    A hard link is tried first, then a reflink, and then a copy. The destination
+    is left untouched if it already has the same content.
+    """
+
+    if same_content(source, destination):
+        return
+
+    destination.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = destination.with_name(f".{destination.name}.{secrets.token_hex(8)}")
+
+    try:
+        try:
+            os.link(source, temp_path)
+        except OSError:
+            clone_file(source, temp_path)
+        os.replace(temp_path, destination)
+    except BaseException:
+        temp_path.unlink(missing_ok=True)
+        raise
+
+
+def clone_file(source: Path, destination: Path) -> None:
+    """Copy file, sharing its blocks with a reflink if the filesystem supports it."""
+
+    try:
+        with source.open("rb") as source_file, destination.open("wb") as clone:
+            fcntl.ioctl(clone.fileno(), _FICLONE, source_file.fileno())
+    except OSError:
+        shutil.copyfile(source, destination)
+
+
+def same_content(source: Path, destination: Path) -> bool:
+    """Whether two files have the same content.
+
+    Hard linked files are recognised without reading them.
+    """
+
+    try:
+        if os.path.samefile(source, destination):
+            return True
+        if source.stat().st_size != destination.stat().st_size:
+            return False
+    except FileNotFoundError:
+        return False
+
+    return file_sha256(source) == file_sha256(destination)
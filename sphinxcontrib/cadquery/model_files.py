@@ -0,0 +1,55 @@
+"""Model file import."""
+
+from pathlib import Path
+from typing import Callable
+
+from cadquery import Shape, exporters, importers
+from OCP.StlAPI import StlAPI_Reader  # type: ignore[import]
+from OCP.TopoDS import TopoDS_Shape  # type: ignore[import]
+
+
+def import_step(path_name: Path) -> Shape:
+    """Import STEP file."""
+
+    return exporters.toCompound(importers.importStep(str(path_name)))
+
+
+def import_brep(path_name: Path) -> Shape:
+    """Import BREP file."""
+
+    return Shape.importBrep(str(path_name))
+
+
+def import_stl(path_name: Path) -> Shape:
+    """Import STL file as a triangulated shape."""
+
+    shape = TopoDS_Shape()
+
+    if not StlAPI_Reader().Read(shape, str(path_name)):
+        raise ValueError(f"unable to read STL file {path_name}")
+
+    return Shape.cast(shape)
+
+
+MODEL_FILE_IMPORTERS: dict[str, Callable[[Path], Shape]] = {
+    ".brep": import_brep,
+    ".brp": import_brep,
+    ".step": import_step,
+    ".stl": import_stl,
+    ".stp": import_step,
+}
+"""Model file importers keyed by lower case file suffix."""
+
+
+def import_model(path_name: Path) -> Shape:
+    """Import STEP, BREP or STL model file."""
+
+    try:
+        importer = MODEL_FILE_IMPORTERS[path_name.suffix.lower()]
+    except KeyError:
+        raise ValueError(
+            f"unsupported model file type {path_name.suffix!r}; "
+            f"must be one of {', '.join(sorted(MODEL_FILE_IMPORTERS))}"
+        )
+
+    return importer(path_name)
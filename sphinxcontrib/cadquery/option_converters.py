@@ -2,6 +2,8 @@
 
 from docutils.parsers.rst import directives
 
+from .common import VIEWS
+
 
 def horizontal_align(argument):
     """Sphinx directive align option."""
@@ -9,12 +11,35 @@ def horizontal_align(argument):
     return directives.choice(argument, ("left", "center", "right"))
 
 
+def view_layout(argument):
+    """Sphinx directive view-layout option."""
+
+    return directives.choice(argument, ("sheet", "separate"))
+
+
 def yes_no(argument):
     """Sphinx directive yes/no option."""
 
     return directives.choice(argument, ("yes", "no"))
 
 
+def view_names(argument):
+    """Convert a space- or comma-separated list of view names to a tuple.
+
+    View names are validated against :data:`~sphinxcontrib.cadquery.common.VIEWS`.
+    """
+
+    names = tuple(argument.replace(",", " ").split())
+
+    if not names:
+        raise ValueError("at least one view name required")
+
+    for name in names:
+        directives.choice(name, tuple(VIEWS))
+
+    return names
+
+
 def color_channel_value(argument):
     """Converts the argument into a float.
 
@@ -0,0 +1,227 @@
+"""Export pack files.
+
+With :confval:`cadquery_export_pack` enabled, the exports shown on a page are
+appended to a single pack file for that page, instead of being written as loose
+files or inlined into the HTML. The page records the offset, length and content
+hash of each SVG image and VTK.js part shape, and fetches it with an HTTP
+``Range`` request.
+
+Each pack has an index of the segments it holds, keyed by content hash. When a
+page is read again, segments of unchanged exports are reused and only new
+exports are appended. A pack is compacted before it is reused once most of it
+is no longer used by its page.
+
+Bytes at an indexed offset never change while a pack is appended to, so a pack
+URI carries a version that changes only when the pack is started afresh or
+compacted. Browsers and proxies may then cache pack responses without serving
+stale bytes after a rebuild.
+"""
+
+import json
+import secrets
+from hashlib import sha256
+from pathlib import Path
+from typing import Any, NamedTuple, Optional
+
+from sphinx.application import Sphinx
+
+from .files import write_atomic
+
+PACK_DIRECTORY = "cadquery-packs"
+
+PACK_FORMAT = 2
+"""Increment when the format of pack files or their index changes."""
+
+
+class PackSegment(NamedTuple):
+    """Location of an export within a pack file."""
+
+    offset: int
+    length: int
+    hash: str
+
+
+class PackFile:
+    """Append-only pack of exports with an index of content hashes."""
+
+    def __init__(self, path: Path) -> None:
+        """
+        Open pack file, reusing segments indexed by a previous build.
+
+        :param path: pack path name; the index is stored alongside
+        """
+
+        self.path = path
+        self.index_path = path.with_name(f"{path.name}.json")
+        self.segments: dict[str, tuple[int, int]] = {}
+        self.used: set[str] = set()
+        self.version = ""
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.load()
+
+    def load(self) -> None:
+        """Load the index, discarding bytes appended after it was written."""
+
+        index = self.read_index()
+
+        if index is None:
+            self.path.write_bytes(b"")
+            self.version = secrets.token_hex(4)
+            return
+
+        with self.path.open("r+b") as pack:
+            pack.truncate(index["size"])
+
+        self.version = index["version"]
+
+        self.segments = {
+            digest: (offset, length)
+            for digest, (offset, length) in index["segments"].items()
+        }
+
+        live = set(index["used"]) & self.segments.keys()
+        live_size = sum(self.segments[digest][1] for digest in live)
+
+        if live_size * 2 < index["size"]:
+            self.compact(live)
+
+    def read_index(self) -> Optional[dict[str, Any]]:
+        """Read the index, or None if missing or inconsistent with the pack."""
+
+        try:
+            index = json.loads(self.index_path.read_text())
+            size = self.path.stat().st_size
+        except (OSError, ValueError):
+            return None
+
+        if (
+            index.get("format") != PACK_FORMAT
+            or not index.get("version")
+            or size < index.get("size", size + 1)
+        ):
+            return None
+
+        return index
+
+    def compact(self, live: set[str]) -> None:
+        """Rewrite the pack holding only the live segments."""
+
+        with self.path.open("rb") as pack:
+            values = {}
+            for digest in sorted(live, key=lambda digest: self.segments[digest][0]):
+                offset, length = self.segments[digest]
+                pack.seek(offset)
+                values[digest] = pack.read(length)
+
+        self.path.write_bytes(b"")
+        self.segments = {}
+        self.version = secrets.token_hex(4)
+
+        for value in values.values():
+            self.add(value)
+
+        self.used = set()
+
+    def add(self, value: bytes) -> PackSegment:
+        """Add export to the pack, reusing an identical segment."""
+
+        digest = sha256(value).hexdigest()
+        self.used.add(digest)
+
+        if digest not in self.segments:
+            with self.path.open("ab") as pack:
+                self.segments[digest] = (pack.tell(), len(value))
+                pack.write(value)
+
+        offset, length = self.segments[digest]
+
+        return PackSegment(offset, length, digest)
+
+    def write_index(self) -> None:
+        """Atomically write the index."""
+
+        index = {
+            "format": PACK_FORMAT,
+            "size": self.path.stat().st_size,
+            "segments": self.segments,
+            "used": sorted(self.used),
+            "version": self.version,
+        }
+        write_atomic(self.index_path, json.dumps(index, sort_keys=True).encode())
+
+
+def pack_path(app: Sphinx, docname: str) -> Path:
+    """Path name of the pack file of a document."""
+
+    return Path(app.outdir) / "_static" / PACK_DIRECTORY / f"{docname}.pack"
+
+
+def pack_uri(docname: str, version: str) -> str:
+    """URI of a version of the pack file of a document, relative to the document."""
+
+    depth = len(Path(docname).parent.parts)
+
+    return "../" * depth + f"_static/{PACK_DIRECTORY}/{docname}.pack?v={version}"
+
+
+def pack_file(app: Sphinx, docname: str) -> PackFile:
+    """Pack file of a document being read."""
+
+    packs = getattr(app, "_sphinxcontrib_cadquery_packs", None)
+
+    if packs is None:
+        packs = {}
+        setattr(app, "_sphinxcontrib_cadquery_packs", packs)
+
+    if docname not in packs:
+        packs[docname] = PackFile(pack_path(app, docname))
+
+    return packs[docname]
+
+
+def pack_export(app: Sphinx, docname: str, export: str) -> dict[str, Any]:
+    """Add export to the pack file of a document.
+
+    :return: reference to the export, used by the page to fetch it
+    """
+
+    pack = pack_file(app, docname)
+    segment = pack.add(export.encode())
+
+    return {"pack": pack_uri(docname, pack.version), **segment._asdict()}
+
+
+def pack_vtk_export(app: Sphinx, docname: str, vtk_json: str) -> str:
+    """Add the part shapes of a VTK.js export to the pack file of a document.
+
+    Each shape is a segment of its own, so that a page can skip fetching parts
+    already in the browser geometry cache.
+
+    :return: VTK.js JSON with a pack segment in place of each shape
+    """
+
+    payload = json.loads(vtk_json)
+    pack = pack_file(app, docname)
+    shapes = payload.pop("shapes")
+
+    payload["pack"] = pack_uri(docname, pack.version)
+    payload["parts"] = [
+        {**part, "segment": pack.add(shape.encode())._asdict()}
+        for part, shape in zip(payload["parts"], shapes)
+    ]
+
+    return json.dumps(payload, separators=(",", ":"))
+
+
+def close_pack(app: Sphinx, doctree: Any) -> None:
+    """Write the index of the pack file of the document just read.
+
+    To be called on the Sphinx doctree-read event, after exports are packed.
+    """
+
+    packs = getattr(app, "_sphinxcontrib_cadquery_packs", {})
+    pack = packs.pop(app.env.docname, None)
+
+    if pack is not None:
+        pack.write_index()
@@ -0,0 +1,415 @@
+"""Live preview.
+
+Pages built with :confval:`cadquery_live_preview` enabled connect to a preview
+server over a WebSocket. The server keeps a warm CadQuery worker process, watches
+the files of every model listed in the preview manifest, rebuilds only the model
+whose file changed, and pushes the new geometry to open pages. The viewer swaps
+the geometry in place, keeping the camera.
+
+Run the server alongside ``sphinx-autobuild``::
+
+    python -m sphinxcontrib.cadquery.preview docs/_build/html
+"""
+
+import argparse
+import asyncio
+import json
+from base64 import b64encode
+from concurrent.futures import ProcessPoolExecutor
+from hashlib import sha1
+from pathlib import Path
+from typing import Any, Optional
+from urllib.parse import urlsplit
+
+from sphinx.application import Sphinx
+from sphinx.environment import BuildEnvironment
+from sphinx.util.docutils import SphinxDirective
+
+from .cqgi import Cqgi, VtkJsonExporter
+from .model_files import import_model
+
+MANIFEST_NAME = "cadquery-preview.json"
+
+_WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+_LOCAL_HOSTS = {"localhost", "127.0.0.1", "::1"}
+
+
+def register_model(
+    directive: SphinxDirective,
+    kind: str,
+    path_name: Path,
+    *,
+    select: Optional[str] = None,
+    color: Optional[list[float]] = None,
+) -> Optional[str]:
+    """Register a file based model for live preview.
+
+    :param directive: directive rendering the model
+    :param kind: "script" for a CadQuery script, "model" for a model file
+    :param path_name: absolute path name of the script or model file
+    :param select: name of object to select from CQGI result
+    :param color: default color in RGBA notation
+    :return: model identifier, or None if live preview is disabled
+    """
+
+    if not directive.config.cadquery_live_preview:
+        return None
+
+    entry = {
+        "color": color,
+        "kind": kind,
+        "path": str(path_name),
+        "select": select,
+    }
+    model_id = sha1(json.dumps(entry, sort_keys=True).encode()).hexdigest()[:12]
+
+    env = directive.env
+    if not hasattr(env, "cadquery_preview_models"):
+        env.cadquery_preview_models = {}  # type: ignore[attr-defined]
+
+    env.cadquery_preview_models.setdefault(  # type: ignore[attr-defined]
+        env.docname, {}
+    )[model_id] = entry
+
+    return model_id
+
+
+def purge_models(app: Sphinx, env: BuildEnvironment, docname: str) -> None:
+    """Remove models registered by a document.
+
+    To be called on the Sphinx env-purge-doc event.
+    """
+
+    getattr(env, "cadquery_preview_models", {}).pop(docname, None)
+
+
+def merge_models(
+    app: Sphinx, env: BuildEnvironment, docnames: set[str], other: BuildEnvironment
+) -> None:
+    """Merge models registered by parallel readers.
+
+    To be called on the Sphinx env-merge-info event.
+    """
+
+    if not hasattr(env, "cadquery_preview_models"):
+        env.cadquery_preview_models = {}  # type: ignore[attr-defined]
+
+    env.cadquery_preview_models.update(  # type: ignore[attr-defined]
+        getattr(other, "cadquery_preview_models", {})
+    )
+
+
+def write_manifest(app: Sphinx, exception: Optional[Exception]) -> None:
+    """Write the live preview manifest.
+
+    To be called on the Sphinx build-finished event.
+    """
+
+    if exception is not None or not app.config.cadquery_live_preview:
+        return
+
+    models: dict[str, Any] = {}
+    for doc_models in getattr(app.env, "cadquery_preview_models", {}).values():
+        models.update(doc_models)
+
+    manifest_path = Path(app.outdir) / "_static" / MANIFEST_NAME
+    manifest_path.parent.mkdir(parents=True, exist_ok=True)
+    manifest_path.write_text(json.dumps({"models": models}, indent=2))
+
+
+def add_preview_script(app: Sphinx) -> None:
+    """Add the live preview WebSocket URL to every page.
+
+    To be called on the Sphinx builder-inited event.
+    """
+
+    if not app.config.cadquery_live_preview:
+        return
+
+    url = f"ws://127.0.0.1:{app.config.cadquery_live_preview_port}"
+    app.add_js_file(None, body=f"window.CADQUERY_LIVE_PREVIEW_URL = {json.dumps(url)};")
+
+
+def export_model(entry: dict[str, Any]) -> str:
+    """Export a manifest entry as VTK.js JSON.
+
+    Runs in the warm worker process.
+    """
+
+    path_name = Path(entry["path"])
+
+    if entry["kind"] == "model":
+        return VtkJsonExporter.export_shape(
+            import_model(path_name), color=entry["color"]
+        )
+
+    # rebuild every time, keeping no build results in the worker
+    Cqgi.clear_builds()
+    result = Cqgi.cqgi_parse(path_name.read_text())
+
+    return VtkJsonExporter(result, entry["select"])(color=entry["color"])
+
+
+def websocket_accept(key: str) -> str:
+    """Sec-WebSocket-Accept header value for a Sec-WebSocket-Key."""
+
+    digest = sha1((key + _WEBSOCKET_GUID).encode()).digest()
+
+    return b64encode(digest).decode()
+
+
+def local_origin(origin: Optional[str]) -> bool:
+    """Whether a WebSocket Origin header is a page served locally.
+
+    Pages opened from the file system send ``null`` or a ``file`` URL; pages
+    served by ``sphinx-autobuild`` or ``python -m http.server`` send a localhost
+    URL. Any other page, or a request without an Origin, is rejected.
+    """
+
+    if origin is None:
+        return False
+    if origin == "null":
+        return True
+
+    try:
+        url = urlsplit(origin)
+    except ValueError:
+        return False
+
+    if url.scheme == "file":
+        return True
+
+    return url.scheme in ("http", "https") and url.hostname in _LOCAL_HOSTS
+
+
+def websocket_handshake(request: str) -> tuple[bool, str]:
+    """Validate a WebSocket opening handshake.
+
+    :param request: HTTP request line and headers
+    :return: whether the connection is accepted, and the HTTP response
+    """
+
+    request_line, *header_lines = request.split("\r\n")
+    headers = {}
+    for line in header_lines:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+
+    key = headers.get("sec-websocket-key")
+
+    if (
+        not request_line.startswith("GET ")
+        or headers.get("upgrade", "").lower() != "websocket"
+        or not key
+    ):
+        return False, "HTTP/1.1 400 Bad Request\r\nConnection: close\r\n\r\n"
+
+    if not local_origin(headers.get("origin")):
+        return False, "HTTP/1.1 403 Forbidden\r\nConnection: close\r\n\r\n"
+
+    return True, (
+        "HTTP/1.1 101 Switching Protocols\r\n"
+        "Upgrade: websocket\r\n"
+        "Connection: Upgrade\r\n"
+        f"Sec-WebSocket-Accept: {websocket_accept(key)}\r\n\r\n"
+    )
+
+
+def websocket_text_frame(payload: str) -> bytes:
+    """Unmasked, unfragmented WebSocket text frame."""
+
+    data = payload.encode()
+    length = len(data)
+
+    if length < 126:
+        header = bytes([0x81, length])
+    elif length < 1 << 16:
+        header = bytes([0x81, 126]) + length.to_bytes(2, "big")
+    else:
+        header = bytes([0x81, 127]) + length.to_bytes(8, "big")
+
+    return header + data
+
+
+class PreviewServer:
+    """Watch model files and push rebuilt geometry to connected pages."""
+
+    def __init__(self, outdir: Path, *, port: int, interval: float = 0.25) -> None:
+        """
+        Initialise preview server.
+
+        :param outdir: Sphinx HTML output directory containing the manifest
+        :param port: WebSocket port
+        :param interval: file polling interval in seconds
+        """
+
+        self.manifest_path = outdir / "_static" / MANIFEST_NAME
+        self.port = port
+        self.interval = interval
+        self.clients: set[asyncio.StreamWriter] = set()
+        self.models: dict[str, dict[str, Any]] = {}
+        self.mtimes: dict[str, Optional[float]] = {}
+        self.building: set[str] = set()
+        self.pool = ProcessPoolExecutor(max_workers=1)
+
+    async def serve(self) -> None:
+        """Serve until cancelled."""
+
+        # start the worker now so that CadQuery is imported before the first edit
+        await asyncio.get_running_loop().run_in_executor(self.pool, _warm_up)
+
+        server = await asyncio.start_server(self.handle_client, "127.0.0.1", self.port)
+        print(f"CadQuery live preview on ws://127.0.0.1:{self.port}", flush=True)
+
+        async with server:
+            await self.watch()
+
+    async def handle_client(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Perform WebSocket handshake and hold connection open."""
+
+        try:
+            request = await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            writer.close()
+            return
+
+        accepted, response = websocket_handshake(request.decode("latin-1"))
+        writer.write(response.encode())
+
+        if not accepted:
+            await writer.drain()
+            writer.close()
+            return
+
+        self.clients.add(writer)
+
+        try:
+            while await self.read_frame(reader) != 0x8:  # close
+                pass
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.clients.discard(writer)
+            writer.close()
+
+    @staticmethod
+    async def read_frame(reader: asyncio.StreamReader) -> int:
+        """Read and discard a client frame, returning its opcode."""
+
+        first, second = await reader.readexactly(2)
+        length = second & 0x7F
+
+        if length == 126:
+            length = int.from_bytes(await reader.readexactly(2), "big")
+        elif length == 127:
+            length = int.from_bytes(await reader.readexactly(8), "big")
+
+        await reader.readexactly(length + (4 if second & 0x80 else 0))
+
+        return first & 0x0F
+
+    async def broadcast(self, message: str) -> None:
+        """Send a text message to every connected page."""
+
+        frame = websocket_text_frame(message)
+
+        for writer in list(self.clients):
+            try:
+                writer.write(frame)
+                await writer.drain()
+            except ConnectionError:
+                self.clients.discard(writer)
+
+    def load_manifest(self) -> None:
+        """Reload the manifest written by the last Sphinx build."""
+
+        try:
+            models = json.loads(self.manifest_path.read_text())["models"]
+        except (OSError, ValueError, KeyError):
+            return
+
+        for model_id, entry in models.items():
+            if model_id not in self.models:
+                self.mtimes[model_id] = _mtime(entry["path"])
+
+        self.models = models
+
+    async def watch(self) -> None:
+        """Poll the manifest and model files for changes."""
+
+        manifest_mtime = None
+
+        while True:
+            if _mtime(self.manifest_path) != manifest_mtime:
+                manifest_mtime = _mtime(self.manifest_path)
+                self.load_manifest()
+
+            for model_id in self.changed_models():
+                self.building.add(model_id)
+                asyncio.create_task(self.rebuild(model_id))
+
+            await asyncio.sleep(self.interval)
+
+    def changed_models(self) -> list[str]:
+        """Models whose file changed since last built, and not being rebuilt."""
+
+        return [
+            model_id
+            for model_id, entry in self.models.items()
+            if model_id not in self.building
+            and _mtime(entry["path"]) != self.mtimes.get(model_id)
+        ]
+
+    async def rebuild(self, model_id: str) -> None:
+        """Rebuild one model in the worker and push it to connected pages."""
+
+        entry = self.models[model_id]
+        self.mtimes[model_id] = _mtime(entry["path"])
+        loop = asyncio.get_running_loop()
+
+        try:
+            vtk_json = await loop.run_in_executor(self.pool, export_model, entry)
+        except Exception as err:
+            print(f"Live preview of {entry['path']} failed: {err}", flush=True)
+            message = json.dumps({"model": model_id, "error": str(err)})
+        else:
+            print(f"Live preview rebuilt {entry['path']}", flush=True)
+            message = f'{{"model":{json.dumps(model_id)},"data":{vtk_json}}}'
+        finally:
+            self.building.discard(model_id)
+
+        await self.broadcast(message)
+
+
+def _mtime(path_name: Any) -> Optional[float]:
+    """Modification time, or None if the file does not exist."""
+
+    try:
+        return Path(path_name).stat().st_mtime
+    except OSError:
+        return None
+
+
+def _warm_up() -> None:
+    """Worker process initialisation; CadQuery is imported with this module."""
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    """Run the live preview server."""
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("outdir", type=Path, help="Sphinx HTML output directory")
+    parser.add_argument("--port", type=int, default=8765, help="WebSocket port")
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(PreviewServer(args.outdir, port=args.port).serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,26 @@
 const RENDERERS = {};
 var ID = 0;
 
+// renderers by model identifier, for live preview
+const MODELS = {};
+
+// incremented when a renderer's geometry is replaced, to stop stale streaming
+const GENERATIONS = new Map();
+
+// viewer identifiers by renderer
+const VIEWER_IDS = new Map();
+
+// performance statistics by viewer identifier
+const PERFORMANCE = {};
+
+// performance overlay elements by viewer identifier
+const PERFORMANCE_OVERLAYS = {};
+
+const PERFORMANCE_OVERLAY = (
+  window.CADQUERY_PERFORMANCE_OVERLAY
+  || new URLSearchParams(window.location.search).has('cadquery-performance')
+);
+
 const renderWindow = vtk.Rendering.Core.vtkRenderWindow.newInstance();
 const openglRenderWindow = vtk.Rendering.OpenGL.vtkRenderWindow.newInstance();
 renderWindow.addView(openglRenderWindow);
@@ -45,6 +65,150 @@ document.addEventListener('DOMContentLoaded', function () {
   document.body.appendChild(rootContainer);
 });
 
+function performanceStats(viewerId) {
+  if (!(viewerId in PERFORMANCE)) {
+    PERFORMANCE[viewerId] = {
+      viewer: viewerId,
+      parts: 0,
+      cachedParts: 0,
+      payloadBytes: 0,
+      parseMs: 0,
+      estimatedGpuBytes: 0,
+      firstFrameMs: null,
+      geometryMs: null,
+      frameCount: 0,
+      frameMeanMs: null,
+      frameMaxMs: null,
+    };
+  }
+  return PERFORMANCE[viewerId];
+}
+
+function markPerformance(viewerId, name) {
+  performance.mark(`cadquery:${viewerId}:${name}`);
+}
+
+function recordPerformance(viewerId, name, start, end, detail = {}) {
+  // user timing entry, plus a "cadquery-performance" event for site analytics
+  const entryName = `cadquery:${viewerId}:${name}`;
+  try {
+    performance.measure(entryName, { start, end, detail });
+  } catch (e) {
+    // user timing level 3 not supported
+  }
+  document.dispatchEvent(new CustomEvent('cadquery-performance', {
+    detail: { viewer: viewerId, name, duration: end - start, ...detail },
+  }));
+  updatePerformanceOverlay(viewerId);
+}
+
+function measureFromStart(viewerId, name) {
+  const starts = performance.getEntriesByName(`cadquery:${viewerId}:render-start`);
+  const start = starts[starts.length - 1];
+  markPerformance(viewerId, name);
+  const end = performance.now();
+  recordPerformance(viewerId, name, start ? start.startTime : end, end);
+  return start ? end - start.startTime : 0;
+}
+
+function resetPerformance(viewerId) {
+  delete PERFORMANCE[viewerId];
+  markPerformance(viewerId, 'render-start');
+}
+
+function markFirstFrame(viewerId) {
+  const stats = performanceStats(viewerId);
+  if (stats.firstFrameMs === null) {
+    stats.firstFrameMs = measureFromStart(viewerId, 'first-frame');
+  }
+}
+
+function markGeometryComplete(viewerId) {
+  const stats = performanceStats(viewerId);
+  stats.geometryMs = measureFromStart(viewerId, 'geometry-complete');
+}
+
+function estimatedGpuBytes(polydata) {
+  // size of the arrays uploaded to the GPU; WebGL does not report actual usage
+  let bytes = 0;
+  const cellArrays = [
+    polydata.getPoints(),
+    polydata.getVerts(),
+    polydata.getLines(),
+    polydata.getPolys(),
+    polydata.getStrips(),
+  ];
+  for (const array of cellArrays) {
+    bytes += array.getData().byteLength;
+  }
+  const pointData = polydata.getPointData();
+  for (let i = 0; i < pointData.getNumberOfArrays(); i++) {
+    bytes += pointData.getArrayByIndex(i).getData().byteLength;
+  }
+  return bytes;
+}
+
+function formatBytes(bytes) {
+  return `${(bytes / 1048576).toFixed(2)} MB`;
+}
+
+function formatMs(ms) {
+  return ms === null ? '…' : `${ms.toFixed(1)} ms`;
+}
+
+function updatePerformanceOverlay(viewerId) {
+  const overlay = PERFORMANCE_OVERLAYS[viewerId];
+  if (!overlay) {
+    return;
+  }
+  const stats = performanceStats(viewerId);
+  overlay.textContent = [
+    `parts: ${stats.parts}, ${stats.cachedParts} cached (${formatBytes(stats.payloadBytes)})`,
+    `XML parse: ${formatMs(stats.parseMs)}`,
+    `first frame: ${formatMs(stats.firstFrameMs)}`,
+    `geometry: ${formatMs(stats.geometryMs)}`,
+    `GPU (est.): ${formatBytes(stats.estimatedGpuBytes)}`,
+    `frames: ${stats.frameCount}, mean ${formatMs(stats.frameMeanMs)}, `
+    + `max ${formatMs(stats.frameMaxMs)}`,
+  ].join('\n');
+}
+
+// frame times while interacting, attributed to the current renderer
+let interactionFrames = [];
+let lastAnimationTime = null;
+
+interactor.onStartAnimation(function () {
+  interactionFrames = [];
+  lastAnimationTime = performance.now();
+});
+
+interactor.onAnimation(function () {
+  const now = performance.now();
+  if (lastAnimationTime !== null) {
+    interactionFrames.push(now - lastAnimationTime);
+  }
+  lastAnimationTime = now;
+});
+
+interactor.onEndAnimation(function () {
+  const viewerId = VIEWER_IDS.get(interactor.getCurrentRenderer());
+  if (viewerId === undefined || !interactionFrames.length) {
+    return;
+  }
+  const stats = performanceStats(viewerId);
+  const total = interactionFrames.reduce((a, b) => a + b, 0);
+  const end = performance.now();
+  stats.frameCount = interactionFrames.length;
+  stats.frameMeanMs = total / interactionFrames.length;
+  stats.frameMaxMs = Math.max(...interactionFrames);
+  recordPerformance(viewerId, 'interaction', end - total, end, {
+    frames: stats.frameCount,
+    frameMeanMs: stats.frameMeanMs,
+    frameMaxMs: stats.frameMaxMs,
+  });
+  lastAnimationTime = null;
+});
+
 function updateViewPort(element, renderer) {
   const { innerHeight, innerWidth } = window;
   const { x, y, width, height } = element.getBoundingClientRect();
@@ -102,45 +266,492 @@ function applyStyle(element) {
 
 window.addEventListener('load', resize);
 
-function render(data, parent_element, ratio) {
+// Maximum number of triangles parsed per animation frame while streaming parts.
+const TRIANGLES_PER_FRAME = 100000;
 
-  // Initial setup
-  const renderer = vtk.Rendering.Core.vtkRenderer.newInstance({ background: [1, 1, 1] });
+function parsePolyData(shape, stats) {
+  // shape is VTK XML, inline as a string or fetched from a pack file
+  const reader = vtk.IO.XML.vtkXMLPolyDataReader.newInstance();
+  const buffer = typeof shape === 'string' ? new TextEncoder().encode(shape) : shape;
+  const parseStart = performance.now();
+  reader.parseAsArrayBuffer(buffer);
 
-  // iterate over all children
-  for (var el of data) {
-    var trans = el.position;
-    var rot = el.orientation;
-    var rgba = el.color;
-    var shape = el.shape;
+  if (stats) {
+    stats.parseMs += performance.now() - parseStart;
+    stats.payloadBytes += buffer.byteLength;
+  }
 
-    // load the inline data
-    var reader = vtk.IO.XML.vtkXMLPolyDataReader.newInstance();
-    const textEncoder = new TextEncoder();
-    reader.parseAsArrayBuffer(textEncoder.encode(shape));
+  return reader.getOutputData();
+}
+
+function createPartActor(part, polydata, stats) {
+  var trans = part.position;
+  var rot = part.orientation;
+  var rgba = part.color;
+
+  if (stats) {
+    stats.parts += 1;
+    stats.estimatedGpuBytes += estimatedGpuBytes(polydata);
+  }
 
-    // setup actor,mapper and add
-    const mapper = vtk.Rendering.Core.vtkMapper.newInstance();
-    mapper.setInputConnection(reader.getOutputPort());
-    mapper.setResolveCoincidentTopologyToPolygonOffset();
-    mapper.setResolveCoincidentTopologyPolygonOffsetParameters(0.5, 100);
+  // setup actor,mapper and add
+  const mapper = vtk.Rendering.Core.vtkMapper.newInstance();
+  mapper.setInputData(polydata);
+  mapper.setResolveCoincidentTopologyToPolygonOffset();
+  mapper.setResolveCoincidentTopologyPolygonOffsetParameters(0.5, 100);
 
-    const actor = vtk.Rendering.Core.vtkActor.newInstance();
-    actor.setMapper(mapper);
+  const actor = vtk.Rendering.Core.vtkActor.newInstance();
+  actor.setMapper(mapper);
 
-    // set color and position
-    actor.getProperty().setColor(rgba.slice(0, 3));
-    actor.getProperty().setOpacity(rgba[3]);
+  // set color and position
+  actor.getProperty().setColor(rgba.slice(0, 3));
+  actor.getProperty().setOpacity(rgba[3]);
 
-    actor.rotateZ(rot[2] * 180 / Math.PI);
-    actor.rotateY(rot[1] * 180 / Math.PI);
-    actor.rotateX(rot[0] * 180 / Math.PI);
+  actor.rotateZ(rot[2] * 180 / Math.PI);
+  actor.rotateY(rot[1] * 180 / Math.PI);
+  actor.rotateX(rot[0] * 180 / Math.PI);
 
-    actor.setPosition(trans);
+  actor.setPosition(trans);
+
+  return actor;
+}
+
+function createPlaceholderActor(bounds) {
+  // wireframe bounding box shown until the part geometry has been parsed
+  const [x0, x1, y0, y1, z0, z1] = bounds;
+  const points = Float32Array.from([
+    x0, y0, z0, x1, y0, z0, x1, y1, z0, x0, y1, z0,
+    x0, y0, z1, x1, y0, z1, x1, y1, z1, x0, y1, z1,
+  ]);
+  const edges = [
+    [0, 1], [1, 2], [2, 3], [3, 0],
+    [4, 5], [5, 6], [6, 7], [7, 4],
+    [0, 4], [1, 5], [2, 6], [3, 7],
+  ];
+  const lines = Uint32Array.from(edges.flatMap((edge) => [2, ...edge]));
+
+  const polydata = vtk.Common.DataModel.vtkPolyData.newInstance();
+  polydata.getPoints().setData(points, 3);
+  polydata.getLines().setData(lines);
+
+  const mapper = vtk.Rendering.Core.vtkMapper.newInstance();
+  mapper.setInputData(polydata);
+
+  const actor = vtk.Rendering.Core.vtkActor.newInstance();
+  actor.setMapper(mapper);
+  actor.getProperty().setColor([0.6, 0.6, 0.6]);
+
+  return actor;
+}
+
+function loadOrder(parts, camera) {
+  // largest and nearest parts first, relative to the initial camera position
+  const position = camera.getPosition();
+  const score = (part) => {
+    const [x0, x1, y0, y1, z0, z1] = part.bounds;
+    const size = Math.hypot(x1 - x0, y1 - y0, z1 - z0);
+    const distance = Math.hypot(
+      (x0 + x1) / 2 - position[0],
+      (y0 + y1) / 2 - position[1],
+      (z0 + z1) / 2 - position[2],
+    );
+    return size / Math.max(distance, Number.EPSILON);
+  };
+  const scores = parts.map(score);
 
+  return parts.map((_, i) => i).sort((a, b) => scores[b] - scores[a]);
+}
+
+function partSources(data, renderer, ready) {
+  // cached geometry, inline shapes, or shapes fetched from the page's pack file
+  return lookupGeometry(data.parts.map((part) => part.hash)).then(function (cached) {
+    data.parts.forEach(function (part, i) {
+      if (cached.has(part.hash)) {
+        ready(i, { cached: cached.get(part.hash) });
+      } else if (data.shapes) {
+        ready(i, { shape: data.shapes[i] });
+      } else {
+        const viewerId = VIEWER_IDS.get(renderer);
+        const fetchStart = performance.now();
+        fetchPackSegment({ pack: data.pack, ...part.segment }).then(function (buffer) {
+          recordPerformance(viewerId, 'payload-fetch', fetchStart, performance.now(), {
+            bytes: buffer.byteLength,
+          });
+          ready(i, { shape: buffer });
+        }, function (error) {
+          console.error(`CadQuery pack geometry: ${error}`);
+          ready(i, { error });
+        });
+      }
+    });
+  });
+}
+
+function streamParts(data, renderer) {
+  const generation = GENERATIONS.get(renderer);
+  const viewerId = VIEWER_IDS.get(renderer);
+  const stats = performanceStats(viewerId);
+  const placeholders = data.parts.map((part) => {
+    const actor = createPlaceholderActor(part.bounds);
     renderer.addActor(actor);
+    return actor;
+  });
+
+  // first frame: bounding box placeholders, with the camera placed from the exported bounds
+  renderer.resetCameraClippingRange();
+  renderWindow.render();
+  markFirstFrame(viewerId);
+  const queue = loadOrder(data.parts, renderer.getActiveCamera());
+  const sources = new Array(data.parts.length);
+  let scheduled = false;
+
+  function schedule() {
+    if (!scheduled) {
+      scheduled = true;
+      window.requestAnimationFrame(step);
+    }
+  }
+
+  function step() {
+    scheduled = false;
+    if (GENERATIONS.get(renderer) !== generation) {
+      return;
+    }
+    const chunkStart = performance.now();
+    let triangles = 0;
+    let parts = 0;
+    let cachedParts = 0;
+    let k;
+    // parts in load order, skipping those still being fetched
+    while (triangles < TRIANGLES_PER_FRAME && (k = queue.findIndex((i) => sources[i])) !== -1) {
+      const i = queue.splice(k, 1)[0];
+      const source = sources[i];
+      renderer.removeActor(placeholders[i]);
+      if (source.error) {
+        continue;
+      }
+      let polydata;
+      if (source.cached) {
+        polydata = geometryFromCache(source.cached);
+        cachedParts++;
+      } else {
+        polydata = parsePolyData(source.shape, stats);
+        triangles += Math.max(data.parts[i].triangles, 1);
+        storeGeometry(data.parts[i].hash, polydata);
+      }
+      renderer.addActor(createPartActor(data.parts[i], polydata, stats));
+      parts++;
+    }
+    stats.cachedParts += cachedParts;
+    renderer.resetCameraClippingRange();
+    renderWindow.render();
+
+    recordPerformance(viewerId, 'chunk', chunkStart, performance.now(), {
+      parts, triangles, cachedParts,
+    });
+
+    if (!queue.length) {
+      markGeometryComplete(viewerId);
+    } else if (queue.some((i) => sources[i])) {
+      schedule();
+    }
+  }
+
+  partSources(data, renderer, function (i, source) {
+    sources[i] = source;
+    schedule();
+  });
+}
+
+function addGeometry(data, renderer) {
+  // legacy payload: an array of parts with inline shapes
+  if (Array.isArray(data)) {
+    const viewerId = VIEWER_IDS.get(renderer);
+    const stats = performanceStats(viewerId);
+    const start = performance.now();
+    for (var el of data) {
+      renderer.addActor(createPartActor(el, parsePolyData(el.shape, stats), stats));
+    };
+    recordPerformance(viewerId, 'chunk', start, performance.now(), { parts: data.length });
+    markGeometryComplete(viewerId);
+  } else {
+    streamParts(data, renderer);
+  }
+}
+
+function replaceGeometry(data, renderer) {
+  // swap actors in place, keeping the camera
+  GENERATIONS.set(renderer, GENERATIONS.get(renderer) + 1);
+  resetPerformance(VIEWER_IDS.get(renderer));
+  renderer.removeAllActors();
+  addGeometry(data, renderer);
+  renderWindow.render();
+  markFirstFrame(VIEWER_IDS.get(renderer));
+}
+
+function connectLivePreview(url) {
+  const socket = new WebSocket(url);
+
+  socket.addEventListener('message', function (event) {
+    const parseStart = performance.now();
+    const message = JSON.parse(event.data);
+    const parseEnd = performance.now();
+    if (message.error) {
+      console.error(`CadQuery live preview: ${message.error}`);
+      return;
+    }
+    for (const renderer of MODELS[message.model] || []) {
+      replaceGeometry(message.data, renderer);
+      recordPerformance(VIEWER_IDS.get(renderer), 'payload-parse', parseStart, parseEnd, {
+        bytes: event.data.length,
+      });
+    }
+  });
+
+  socket.addEventListener('close', function () {
+    window.setTimeout(connectLivePreview, 1000, url);
+  });
+}
+
+// decoded part geometry is kept in IndexedDB across page views, keyed by content hash
+const GEOMETRY_CACHE_NAME = 'cadquery-geometry';
+const GEOMETRY_CACHE_VERSION = 1;
+const GEOMETRY_CACHE_BYTES = window.CADQUERY_GEOMETRY_CACHE_BYTES ?? 256 * 1048576;
+const CELL_TYPES = ['Verts', 'Lines', 'Polys', 'Strips'];
+let geometryCache = null;
+
+function openGeometryCache() {
+  // resolves to null if the cache is disabled or unavailable
+  if (!geometryCache) {
+    geometryCache = new Promise(function (resolve) {
+      if (!GEOMETRY_CACHE_BYTES || !window.indexedDB) {
+        resolve(null);
+        return;
+      }
+      const request = indexedDB.open(GEOMETRY_CACHE_NAME, GEOMETRY_CACHE_VERSION);
+      request.onupgradeneeded = function () {
+        const db = request.result;
+        for (const name of Array.from(db.objectStoreNames)) {
+          db.deleteObjectStore(name);
+        }
+        // geometry and its usage are stored apart, so a hit only rewrites the small record
+        db.createObjectStore('geometry');
+        db.createObjectStore('usage', { keyPath: 'hash' }).createIndex('used', 'used');
+      };
+      request.onsuccess = () => resolve(request.result);
+      request.onerror = () => resolve(null);
+      request.onblocked = () => resolve(null);
+    });
+  }
+  return geometryCache;
+}
+
+function lookupGeometry(hashes) {
+  // cached geometry by hash, marking each hit as recently used
+  const found = new Map();
+  return openGeometryCache().then(function (db) {
+    const wanted = hashes.filter((hash) => hash);
+    if (!db || !wanted.length) {
+      return found;
+    }
+    return new Promise(function (resolve) {
+      const transaction = db.transaction(['geometry', 'usage'], 'readwrite');
+      const geometry = transaction.objectStore('geometry');
+      const usage = transaction.objectStore('usage');
+      const now = Date.now();
+      for (const hash of new Set(wanted)) {
+        geometry.get(hash).onsuccess = function (event) {
+          const entry = event.target.result;
+          if (entry) {
+            found.set(hash, entry);
+            usage.put({ hash, bytes: entry.bytes, used: now });
+          }
+        };
+      }
+      transaction.oncomplete = () => resolve(found);
+      transaction.onerror = () => resolve(found);
+      transaction.onabort = () => resolve(found);
+    });
+  });
+}
+
+function ownBuffer(array) {
+  // structured cloning a view would store the whole underlying buffer
+  return array.byteLength === array.buffer.byteLength ? array : array.slice();
+}
+
+function storeGeometry(hash, polydata) {
+  const bytes = estimatedGpuBytes(polydata);
+  if (!hash || bytes > GEOMETRY_CACHE_BYTES) {
+    return;
+  }
+  const entry = {
+    points: ownBuffer(polydata.getPoints().getData()),
+    cells: {},
+    pointData: [],
+    bytes,
+  };
+  for (const type of CELL_TYPES) {
+    entry.cells[type] = ownBuffer(polydata[`get${type}`]().getData());
+  }
+  const pointData = polydata.getPointData();
+  for (let i = 0; i < pointData.getNumberOfArrays(); i++) {
+    const array = pointData.getArrayByIndex(i);
+    entry.pointData.push({
+      name: array.getName(),
+      numberOfComponents: array.getNumberOfComponents(),
+      values: ownBuffer(array.getData()),
+      normals: array === pointData.getNormals(),
+    });
+  }
+  openGeometryCache().then(function (db) {
+    if (!db) {
+      return;
+    }
+    const transaction = db.transaction(['geometry', 'usage'], 'readwrite');
+    transaction.objectStore('geometry').put(entry, hash);
+    transaction.objectStore('usage').put({ hash, bytes: entry.bytes, used: Date.now() });
+    transaction.oncomplete = () => evictGeometry(db);
+  });
+}
 
+function evictGeometry(db) {
+  // least recently used geometry beyond the size cap is deleted
+  const transaction = db.transaction(['geometry', 'usage'], 'readwrite');
+  const geometry = transaction.objectStore('geometry');
+  let total = 0;
+  transaction.objectStore('usage').index('used').openCursor(null, 'prev').onsuccess = function (event) {
+    const cursor = event.target.result;
+    if (!cursor) {
+      return;
+    }
+    total += cursor.value.bytes;
+    if (total > GEOMETRY_CACHE_BYTES) {
+      geometry.delete(cursor.value.hash);
+      cursor.delete();
+    }
+    cursor.continue();
   };
+}
+
+function geometryFromCache(entry) {
+  const polydata = vtk.Common.DataModel.vtkPolyData.newInstance();
+  polydata.getPoints().setData(entry.points, 3);
+  for (const type of CELL_TYPES) {
+    polydata[`get${type}`]().setData(entry.cells[type]);
+  }
+  for (const array of entry.pointData) {
+    const dataArray = vtk.Common.Core.vtkDataArray.newInstance({
+      name: array.name,
+      numberOfComponents: array.numberOfComponents,
+      values: array.values,
+    });
+    if (array.normals) {
+      polydata.getPointData().setNormals(dataArray);
+    } else {
+      polydata.getPointData().addArray(dataArray);
+    }
+  }
+  return polydata;
+}
+
+// pack segments requested but not yet fetched, by pack URL
+const PACK_REQUESTS = new Map();
+
+// segments closer than this many bytes are fetched with one range request
+const PACK_RANGE_GAP = 65536;
+
+function fetchPackSegment(segment) {
+  // requests made while the page is parsed are coalesced into as few ranges as possible
+  return new Promise(function (resolve, reject) {
+    if (!PACK_REQUESTS.has(segment.pack)) {
+      PACK_REQUESTS.set(segment.pack, []);
+      if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', () => fetchPackRanges(segment.pack));
+      } else {
+        window.setTimeout(fetchPackRanges, 0, segment.pack);
+      }
+    }
+    PACK_REQUESTS.get(segment.pack).push({ segment, resolve, reject });
+  });
+}
+
+function fetchPackRanges(pack) {
+  const requests = PACK_REQUESTS.get(pack).sort((a, b) => a.segment.offset - b.segment.offset);
+  PACK_REQUESTS.delete(pack);
+
+  const ranges = [];
+  for (const request of requests) {
+    const range = ranges[ranges.length - 1];
+    const end = request.segment.offset + request.segment.length;
+    if (range && request.segment.offset - range.end <= PACK_RANGE_GAP) {
+      range.end = Math.max(range.end, end);
+      range.requests.push(request);
+    } else {
+      ranges.push({ start: request.segment.offset, end, requests: [request] });
+    }
+  }
+
+  for (const range of ranges) {
+    fetch(pack, { headers: { Range: `bytes=${range.start}-${range.end - 1}` } })
+      .then(function (response) {
+        if (!response.ok) {
+          throw new Error(`${pack}: ${response.status} ${response.statusText}`);
+        }
+        // a server ignoring the range sends the whole pack
+        const base = response.status === 206 ? range.start : 0;
+        return response.arrayBuffer().then(function (buffer) {
+          for (const { segment, resolve } of range.requests) {
+            const start = segment.offset - base;
+            resolve(buffer.slice(start, start + segment.length));
+          }
+        });
+      })
+      .catch(function (error) {
+        for (const { reject } of range.requests) {
+          reject(error);
+        }
+      });
+  }
+}
+
+function loadPackImages() {
+  for (const img of document.querySelectorAll('img[data-cadquery-pack]')) {
+    fetchPackSegment({
+      pack: img.dataset.cadqueryPack,
+      offset: Number(img.dataset.offset),
+      length: Number(img.dataset.length),
+      hash: img.dataset.hash,
+    }).then(function (buffer) {
+      img.src = URL.createObjectURL(new Blob([buffer], { type: 'image/svg+xml' }));
+    }).catch(function (error) {
+      console.error(`CadQuery pack image: ${error}`);
+    });
+  }
+}
+
+document.addEventListener('DOMContentLoaded', loadPackImages);
+
+document.addEventListener('DOMContentLoaded', function () {
+  if (window.CADQUERY_LIVE_PREVIEW_URL) {
+    connectLivePreview(window.CADQUERY_LIVE_PREVIEW_URL);
+  }
+});
+
+function render(data, parent_element, ratio) {
+
+  // Initial setup
+  const renderer = vtk.Rendering.Core.vtkRenderer.newInstance({ background: [1, 1, 1] });
+  GENERATIONS.set(renderer, 0);
+  VIEWER_IDS.set(renderer, ID);
+  markPerformance(ID, 'render-start');
+
+  if (PERFORMANCE_OVERLAY) {
+    const overlay = document.createElement('pre');
+    overlay.classList.add('cadquery-performance');
+    parent_element.parentNode.appendChild(overlay);
+    PERFORMANCE_OVERLAYS[ID] = overlay;
+  }
 
   //add the container
   const container = applyStyle(document.createElement("div"));
@@ -152,7 +763,25 @@ function render(data, parent_element, ratio) {
   renderWindow.addRenderer(renderer);
   updateViewPort(container, renderer);
   renderer.getActiveCamera().set({ position: [1, -1, 1], viewUp: [0, 0, 1] });
-  renderer.resetCamera();
+
+  if (Array.isArray(data)) {
+    addGeometry(data, renderer);
+    renderer.resetCamera();
+    const viewerId = ID;
+    window.requestAnimationFrame(function () {
+      renderWindow.render();
+      markFirstFrame(viewerId);
+    });
+  } else {
+    // place the camera from the exported bounds before any geometry is parsed
+    renderer.resetCamera(data.bounds);
+    addGeometry(data, renderer);
+  }
+
+  const modelId = parent_element.dataset && parent_element.dataset.cadqueryModel;
+  if (modelId) {
+    (MODELS[modelId] = MODELS[modelId] || []).push(renderer);
+  }
 
   RENDERERS[ID] = renderer;
   ID++;
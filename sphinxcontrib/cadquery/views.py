@@ -0,0 +1,144 @@
+"""Multi-view SVG drawings.
+
+Each view is a hidden line removal projection of the same shape. Views missing
+from the export cache are projected in parallel worker processes, so the shape is
+built once and only the projections are repeated.
+"""
+
+import re
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from typing import Any, Callable, Optional
+
+from cadquery import Shape, exporters
+
+from .cache import ExportCache
+from .common import VIEWS
+from .cqgi import SvgExporter
+
+_POOL: Optional[ProcessPoolExecutor] = None
+
+_XML_DECLARATION = re.compile(r"^\s*<\?xml[^>]*\?>\s*")
+_SVG_SIZE = re.compile(r'<svg\b[^>]*?\bwidth="([\d.]+)[^"]*"[^>]*?\bheight="([\d.]+)')
+
+SHEET_COLUMNS = 2
+SHEET_LABEL_HEIGHT = 24
+
+
+def project(brep: bytes, view: str) -> str:
+    """Project a BREP serialised shape as an SVG view.
+
+    Runs in a worker process.
+    """
+
+    shape = Shape.importBrep(BytesIO(brep))
+
+    return exporters.getSVG(shape, {"projectionDir": VIEWS[view]})
+
+
+def export_views(
+    cache: ExportCache,
+    key_parts: dict[str, Any],
+    views: tuple[str, ...],
+    select_shape: Callable[[], Any],
+) -> dict[str, str]:
+    """Export SVG views, each cached independently.
+
+    :param cache: export cache
+    :param key_parts: parts determining the shape to be projected
+    :param views: view names
+    :param select_shape: build and return the object to be projected; only called
+        if a view is not cached
+    :return: SVG documents keyed by view name, in order of views
+    """
+
+    documents = {}
+    for view in views:
+        document = cache.get({**key_parts, "view": view})
+        if document is not None:
+            documents[view] = document
+    missing = [view for view in views if view not in documents]
+
+    if missing:
+        compound = SvgExporter.to_compound(select_shape())
+
+        if len(missing) == 1:
+            documents[missing[0]] = exporters.getSVG(
+                compound, {"projectionDir": VIEWS[missing[0]]}
+            )
+        else:
+            brep = BytesIO()
+            compound.exportBrep(brep)
+            futures = {
+                view: _pool().submit(project, brep.getvalue(), view) for view in missing
+            }
+            for view, future in futures.items():
+                documents[view] = future.result()
+
+        for view in missing:
+            cache.set({**key_parts, "view": view}, documents[view])
+
+    return {view: documents[view] for view in views}
+
+
+def svg_sheet(documents: dict[str, str], columns: int = SHEET_COLUMNS) -> str:
+    """Lay out SVG views in a grid on a single labelled sheet."""
+
+    views = []
+    for view, document in documents.items():
+        svg = _XML_DECLARATION.sub("", document, count=1).strip()
+        size = _SVG_SIZE.search(svg)
+        width, height = (float(size[1]), float(size[2])) if size else (800, 240)
+        views.append((view, svg, width, height))
+
+    cell_width = max(width for _, _, width, _ in views)
+    cell_height = max(height for _, _, _, height in views) + SHEET_LABEL_HEIGHT
+    rows = -(-len(views) // columns)
+    sheet_width = cell_width * min(columns, len(views))
+    sheet_height = cell_height * rows
+
+    elements = []
+    for index, (view, svg, width, height) in enumerate(views):
+        x = (index % columns) * cell_width + (cell_width - width) / 2
+        y = (index // columns) * cell_height
+        elements.append(svg.replace("<svg", f'<svg x="{x:g}" y="{y:g}"', 1))
+        elements.append(
+            f'<text x="{x + width / 2:g}" y="{y + height + SHEET_LABEL_HEIGHT - 6:g}" '
+            'text-anchor="middle" font-family="sans-serif" font-size="14">'
+            f"{view}</text>"
+        )
+
+    return "\n".join(
+        [
+            '<?xml version="1.0" encoding="UTF-8" standalone="no"?>',
+            '<svg xmlns="http://www.w3.org/2000/svg" '
+            f'width="{sheet_width:g}" height="{sheet_height:g}" '
+            f'viewBox="0 0 {sheet_width:g} {sheet_height:g}">',
+            *elements,
+            "</svg>",
+        ]
+    )
+
+
+def _pool() -> ProcessPoolExecutor:
+    """Worker process pool for projections."""
+
+    global _POOL
+
+    if _POOL is None:
+        _POOL = ProcessPoolExecutor()
+
+    return _POOL
+
+
+def shutdown_pool(*args: Any) -> None:
+    """Shut down the projection worker processes.
+
+    May be connected to the Sphinx build-finished event.
+    """
+
+    global _POOL
+
+    if _POOL is not None:
+        _POOL.shutdown()
+        _POOL = None
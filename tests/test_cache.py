@@ -0,0 +1,180 @@
+"""Test export cache."""
+
+import os
+from http.client import IncompleteRead
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Thread
+
+import pytest
+
+from sphinxcontrib.cadquery.cache import (
+    ExportCache,
+    HttpCacheBackend,
+    LocalCacheBackend,
+    SharedCacheBackend,
+)
+
+
+class KeyValueHandler(BaseHTTPRequestHandler):
+    """Stand-in HTTP key/value store."""
+
+    store: dict[str, bytes] = {}
+
+    def do_GET(self):
+        value = self.store.get(self.path)
+        if value is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(value)))
+        self.end_headers()
+        self.wfile.write(value)
+
+    def do_PUT(self):
+        length = int(self.headers["Content-Length"])
+        self.store[self.path] = self.rfile.read(length)
+        self.send_response(204)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def http_store():
+    """Base URL of a stand-in HTTP key/value store."""
+    KeyValueHandler.store = {}
+    server = ThreadingHTTPServer(("127.0.0.1", 0), KeyValueHandler)
+    thread = Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+
+    yield f"http://127.0.0.1:{server.server_port}/cache"
+
+    server.shutdown()
+    server.server_close()
+
+
+class TestCacheBackends:
+    """Test cache backends."""
+
+    @pytest.mark.parametrize("backend_class", [LocalCacheBackend, SharedCacheBackend])
+    def test_directory_round_trip(self, tmp_path, backend_class):
+        backend = backend_class(tmp_path)
+
+        assert backend.get("abcdef") is None
+
+        backend.set("abcdef", b"<svg/>")
+
+        assert b"<svg/>" == backend.get("abcdef")
+
+    def test_rewrite_does_not_change_linked_files(self, tmp_path):
+        backend = LocalCacheBackend(tmp_path)
+        backend.set("abcdef", b"first")
+        os.link(backend.path("abcdef"), tmp_path / "linked")
+
+        backend.set("abcdef", b"second")
+
+        assert b"first" == (tmp_path / "linked").read_bytes()
+
+    def test_shared_leaves_no_temporary_files(self, tmp_path):
+        backend = SharedCacheBackend(tmp_path)
+        backend.set("abcdef", b"<svg/>")
+
+        assert ["abcdef", "abcdef.lock"] == sorted(
+            path.name for path in (tmp_path / "ab").iterdir()
+        )
+
+    def test_shared_does_not_rewrite_existing_key(self, tmp_path):
+        backend = SharedCacheBackend(tmp_path)
+        backend.set("abcdef", b"first")
+        backend.set("abcdef", b"second")
+
+        assert b"first" == backend.get("abcdef")
+
+    def test_http_round_trip(self, http_store):
+        backend = HttpCacheBackend(http_store)
+
+        assert backend.get("abcdef") is None
+
+        backend.set("abcdef", b"<svg/>")
+
+        assert b"<svg/>" == backend.get("abcdef")
+
+
+class TestExportCache:
+    """Test export cache."""
+
+    def test_create_once(self, tmp_path):
+        cache = ExportCache(LocalCacheBackend(tmp_path))
+        calls = []
+
+        def create():
+            calls.append(None)
+            return "<svg/>"
+
+        for _ in range(2):
+            assert "<svg/>" == cache.get_or_create({"source": "a"}, create)
+
+        assert 1 == len(calls)
+
+    def test_key_depends_on_parts(self):
+        assert ExportCache.key({"source": "a"}) != ExportCache.key({"source": "b"})
+
+    def test_read_only_does_not_write(self, tmp_path):
+        backend = LocalCacheBackend(tmp_path)
+        cache = ExportCache(backend, "read-only")
+        cache.get_or_create({"source": "a"}, lambda: "<svg/>")
+
+        assert backend.get(ExportCache.key({"source": "a"})) is None
+
+    def test_read_only_reads(self, tmp_path):
+        backend = LocalCacheBackend(tmp_path)
+        backend.set(ExportCache.key({"source": "a"}), b"cached")
+        cache = ExportCache(backend, "read-only")
+
+        assert "cached" == cache.get_or_create({"source": "a"}, lambda: "<svg/>")
+
+    def test_unreachable_backend_is_a_miss(self):
+        cache = ExportCache(HttpCacheBackend("http://127.0.0.1:9", timeout=1))
+
+        assert "<svg/>" == cache.get_or_create({"source": "a"}, lambda: "<svg/>")
+
+    def test_truncated_http_response_is_a_miss(self):
+        class TruncatedBackend(HttpCacheBackend):
+            def get(self, key):
+                raise IncompleteRead(b"<sv", 3)
+
+        cache = ExportCache(TruncatedBackend("http://127.0.0.1:9"))
+
+        assert "<svg/>" == cache.get_or_create({"source": "a"}, lambda: "<svg/>")
+
+    def test_undecodable_value_is_a_miss(self, tmp_path):
+        backend = LocalCacheBackend(tmp_path)
+        backend.set(ExportCache.key({"source": "a"}), b"\xff<svg/>")
+
+        assert ExportCache(backend).get({"source": "a"}) is None
+
+    def test_disabled(self):
+        cache = ExportCache(None)
+
+        assert "<svg/>" == cache.get_or_create({"source": "a"}, lambda: "<svg/>")
+
+    def test_export_from_local_file(self, tmp_path):
+        cache = ExportCache(LocalCacheBackend(tmp_path / "cache"))
+        cache.get_or_create({"source": "a"}, lambda: "<svg/>")
+
+        export = cache.get_or_create_export({"source": "a"}, lambda: "<svg />")
+        export.materialise(tmp_path / "image.svg")
+
+        assert cache.file({"source": "a"}) == export.path_name
+        assert "<svg/>" == export.text()
+        assert (tmp_path / "image.svg").samefile(export.path_name)
+
+    def test_export_without_local_file(self, tmp_path):
+        export = ExportCache(None).get_or_create_export(
+            {"source": "a"}, lambda: "<svg/>"
+        )
+        export.materialise(tmp_path / "image.svg")
+
+        assert export.path_name is None
+        assert "<svg/>" == (tmp_path / "image.svg").read_text()
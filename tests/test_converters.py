@@ -2,7 +2,11 @@
 
 import pytest
 
-from sphinxcontrib.cadquery.option_converters import color_channel_value, rgba
+from sphinxcontrib.cadquery.option_converters import (
+    color_channel_value,
+    rgba,
+    view_names,
+)
 
 
 class TestSphinxRGBAConverter:
@@ -55,3 +59,21 @@ class TestSphinxColorChannelConverter:
     def test_exception_on_non_numeric_value(self):
         with pytest.raises(ValueError):
             color_channel_value("a")
+
+
+class TestSphinxViewNamesConverter:
+    """Test Sphinx view names converter."""
+
+    def test_comma_seperator(self):
+        result = view_names("front, top, iso")
+
+        assert ("front", "top", "iso") == result
+
+    def test_space_seperator(self):
+        result = view_names("front top")
+
+        assert ("front", "top") == result
+
+    def test_exception_on_unknown_view(self):
+        with pytest.raises(ValueError):
+            view_names("front side")
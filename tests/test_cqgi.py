@@ -0,0 +1,157 @@
+"""Test CQGI exporters."""
+
+from types import SimpleNamespace
+
+import pytest
+
+from sphinxcontrib.cadquery import cqgi
+from sphinxcontrib.cadquery.cqgi import Cqgi, Exporter, SvgExporter, VtkJsonExporter
+
+
+class TestCqgiSharedBuilds:
+    """Test sharing of build results."""
+
+    @pytest.fixture
+    def builds(self, monkeypatch):
+        sources = []
+
+        def build(script_source):
+            sources.append(script_source)
+            return SimpleNamespace(source=script_source)
+
+        monkeypatch.setattr(cqgi, "_build", build)
+        Cqgi.clear_builds()
+        yield sources
+        Cqgi.clear_builds()
+
+    def test_same_source_built_once(self, builds):
+        first = Cqgi.cqgi_parse("a")
+        for index in range(20):
+            Cqgi.cqgi_parse(str(index))
+
+        assert first is Cqgi.cqgi_parse("a")
+        assert 1 == builds.count("a")
+
+    def test_clear_builds(self, builds):
+        Cqgi.cqgi_parse("a")
+        Cqgi.clear_builds()
+        Cqgi.cqgi_parse("a")
+
+        assert ["a", "a"] == builds
+
+
+class TestVtkJsonExporterPartSummary:
+    """Test VTK.js JSON part summaries."""
+
+    def test_triangle_count_sums_pieces(self):
+        """Test polygons are counted across all pieces."""
+        vtk_xml = (
+            '<Piece NumberOfPoints="8" NumberOfPolys="12"></Piece>'
+            '<Piece NumberOfPoints="4" NumberOfPolys="2"></Piece>'
+        )
+
+        assert 14 == VtkJsonExporter._triangle_count(vtk_xml)
+
+    def test_triangle_count_without_polys(self):
+        assert 0 == VtkJsonExporter._triangle_count("<VTKFile></VTKFile>")
+
+    def test_union_bounds_initial(self):
+        bounds = [0, 1, 0, 1, 0, 1]
+
+        assert bounds == VtkJsonExporter._union_bounds(None, bounds)
+
+    def test_union_bounds(self):
+        result = VtkJsonExporter._union_bounds(
+            [0, 1, 0, 1, 0, 1], [-1, 0.5, 2, 3, 0, 4]
+        )
+
+        assert [-1, 1, 0, 3, 0, 4] == result
+
+
+class TestExporterSelectShape:
+    """Test selection of objects from a CQGI result."""
+
+    @staticmethod
+    def build_result(shown=(), **env):
+        results = [
+            SimpleNamespace(shape=shape, options={"name": name} if name else {})
+            for name, shape in shown
+        ]
+
+        return SimpleNamespace(
+            env=env, results=results, first_result=results[0] if results else None
+        )
+
+    def test_default_show_object(self):
+        result = self.build_result([(None, "shown")], result="variable")
+
+        assert "shown" == Exporter._select_shape(result, None)
+
+    def test_default_result_variable(self):
+        result = self.build_result(result="variable")
+
+        assert "variable" == Exporter._select_shape(result, None)
+
+    def test_variable_name_with_show_object(self):
+        result = self.build_result([(None, "shown")], plate="variable")
+
+        assert "variable" == Exporter._select_shape(result, "plate")
+
+    def test_show_object_index(self):
+        result = self.build_result([(None, "first"), (None, "second")])
+
+        assert "second" == Exporter._select_shape(result, "show_object:1")
+
+    def test_show_object_name(self):
+        result = self.build_result([("base", "first"), ("bolt", "second")])
+
+        assert "second" == Exporter._select_shape(result, "show_object:bolt")
+
+    def test_assembly_child(self):
+        wheel = SimpleNamespace(objects={"tyre": "tyre"})
+        result = self.build_result(car=SimpleNamespace(objects={"wheel": wheel}))
+
+        assert "tyre" == Exporter._select_shape(result, "car/wheel/tyre")
+
+    def test_list(self):
+        result = self.build_result([(None, "shown")], a="first", b="second")
+
+        assert {"a": "first", "show_object:0": "shown"} == Exporter._select_shape(
+            result, "a, show_object:0"
+        )
+
+    @pytest.mark.parametrize("select", ["missing", "a/child", "show_object:3"])
+    def test_no_object_selected(self, select):
+        result = self.build_result([(None, "shown")], a="first")
+
+        with pytest.raises(ValueError):
+            Exporter._select_shape(result, select)
+
+    def test_show_object_index_out_of_range_message(self):
+        result = self.build_result([(None, "first"), (None, "second")])
+
+        with pytest.raises(ValueError, match="no show_object\\(\\) call at index 2"):
+            Exporter._select_shape(result, "show_object:2")
+
+
+class TestSvgExporter:
+    """Test SVG export of objects selected from a CQGI result."""
+
+    SCRIPT = """
+import cadquery as cq
+
+bolt = cq.Workplane().cylinder(10, 2)
+assy = cq.Assembly().add(cq.Workplane().box(10, 10, 2), name="plate")
+assy.add(bolt, name="bolt")
+show_object(assy)
+"""
+
+    @pytest.fixture
+    def result(self):
+        Cqgi.clear_builds()
+        yield Cqgi.cqgi_parse(self.SCRIPT)
+        Cqgi.clear_builds()
+
+    @pytest.mark.parametrize("select", [None, "assy", "assy/bolt", "bolt, assy"])
+    def test_export(self, result, select):
+        assert "<svg" in SvgExporter(result, select)()
@@ -0,0 +1,84 @@
+"""Test file utilities."""
+
+from hashlib import sha256
+
+from sphinxcontrib.cadquery.files import file_sha256, link_file, write_file
+
+
+class TestFileSha256:
+    """Test file hashing."""
+
+    def test_file_sha256(self, tmp_path):
+        path_name = tmp_path / "part.step"
+        path_name.write_bytes(b"ISO-10303-21;")
+
+        assert sha256(b"ISO-10303-21;").hexdigest() == file_sha256(path_name)
+
+    def test_empty_file(self, tmp_path):
+        path_name = tmp_path / "empty.svg"
+        path_name.write_bytes(b"")
+
+        assert sha256().hexdigest() == file_sha256(path_name)
+
+
+class TestWriteFile:
+    """Test writing files only when changed."""
+
+    def test_write(self, tmp_path):
+        write_file(tmp_path / "a" / "image.svg", b"<svg/>")
+
+        assert b"<svg/>" == (tmp_path / "a" / "image.svg").read_bytes()
+
+    def test_same_content_not_rewritten(self, tmp_path):
+        path_name = tmp_path / "image.svg"
+        path_name.write_bytes(b"<svg/>")
+        inode = path_name.stat().st_ino
+
+        write_file(path_name, b"<svg/>")
+
+        assert inode == path_name.stat().st_ino
+
+    def test_changed_content_rewritten(self, tmp_path):
+        path_name = tmp_path / "image.svg"
+        path_name.write_bytes(b"<svg/>")
+
+        write_file(path_name, b"<svg />")
+
+        assert b"<svg />" == path_name.read_bytes()
+
+
+class TestLinkFile:
+    """Test materialising files without copying."""
+
+    def test_hard_link(self, tmp_path):
+        source = tmp_path / "cache" / "abcdef"
+        source.parent.mkdir()
+        source.write_bytes(b"<svg/>")
+
+        link_file(source, tmp_path / "out" / "image.svg")
+
+        assert source.stat().st_ino == (tmp_path / "out" / "image.svg").stat().st_ino
+
+    def test_replaces_changed_destination(self, tmp_path):
+        source = tmp_path / "abcdef"
+        source.write_bytes(b"<svg/>")
+        destination = tmp_path / "image.svg"
+        destination.write_bytes(b"<svg />")
+
+        link_file(source, destination)
+
+        assert b"<svg/>" == destination.read_bytes()
+        assert ["abcdef", "image.svg"] == sorted(
+            path.name for path in tmp_path.iterdir()
+        )
+
+    def test_same_content_not_replaced(self, tmp_path):
+        source = tmp_path / "abcdef"
+        source.write_bytes(b"<svg/>")
+        destination = tmp_path / "image.svg"
+        destination.write_bytes(b"<svg/>")
+        inode = destination.stat().st_ino
+
+        link_file(source, destination)
+
+        assert inode == destination.stat().st_ino
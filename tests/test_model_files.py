@@ -0,0 +1,42 @@
+"""Test model file import."""
+
+import json
+from pathlib import Path
+
+import cadquery as cq
+import pytest
+
+from sphinxcontrib.cadquery.cqgi import SvgExporter, VtkJsonExporter
+from sphinxcontrib.cadquery.model_files import import_model
+
+
+@pytest.fixture(params=["box.brep", "box.step"])
+def model_file(request, tmp_path):
+    path_name = tmp_path / request.param
+    box = cq.Workplane().box(1, 2, 3)
+
+    if path_name.suffix == ".brep":
+        box.val().exportBrep(str(path_name))
+    else:
+        cq.exporters.export(box, str(path_name))
+
+    return path_name
+
+
+class TestModelFiles:
+    """Test model file import."""
+
+    def test_unsupported_suffix(self):
+        with pytest.raises(ValueError):
+            import_model(Path("part.obj"))
+
+    def test_svg_export(self, model_file):
+        svg = SvgExporter.export_shape(import_model(model_file))
+
+        assert "<svg" in svg
+
+    def test_vtk_export(self, model_file):
+        vtk_json = json.loads(VtkJsonExporter.export_shape(import_model(model_file)))
+
+        assert 1 == len(vtk_json["parts"])
+        assert "<VTKFile" in vtk_json["shapes"][0]
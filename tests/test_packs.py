@@ -0,0 +1,131 @@
+"""Test export pack files."""
+
+import json
+from types import SimpleNamespace
+
+from sphinxcontrib.cadquery.packs import PackFile, pack_uri, pack_vtk_export
+
+
+class TestPackFile:
+    """Test export pack file."""
+
+    def test_segments(self, tmp_path):
+        pack = PackFile(tmp_path / "index.pack")
+        first = pack.add(b"<svg/>")
+        second = pack.add(b'{"parts": []}')
+
+        assert (0, 6) == (first.offset, first.length)
+        assert (6, 13) == (second.offset, second.length)
+        assert b'<svg/>{"parts": []}' == pack.path.read_bytes()
+
+    def test_identical_exports_share_segment(self, tmp_path):
+        pack = PackFile(tmp_path / "index.pack")
+
+        assert pack.add(b"<svg/>") == pack.add(b"<svg/>")
+        assert 6 == pack.path.stat().st_size
+
+    def test_reuse_segments_between_builds(self, tmp_path):
+        pack = PackFile(tmp_path / "index.pack")
+        segment = pack.add(b"<svg/>")
+        pack.write_index()
+
+        pack = PackFile(tmp_path / "index.pack")
+
+        assert segment == pack.add(b"<svg/>")
+        assert (6, 2) == pack.add(b"[]")[:2]
+
+    def test_discard_bytes_not_indexed(self, tmp_path):
+        pack = PackFile(tmp_path / "index.pack")
+        pack.add(b"<svg/>")
+        pack.write_index()
+        pack.add(b"[]")
+
+        pack = PackFile(tmp_path / "index.pack")
+
+        assert 6 == pack.path.stat().st_size
+
+    def test_missing_index_starts_empty_pack(self, tmp_path):
+        (tmp_path / "index.pack").write_bytes(b"stale")
+
+        pack = PackFile(tmp_path / "index.pack")
+
+        assert (0, 6) == pack.add(b"<svg/>")[:2]
+
+    def test_compact_unused_segments(self, tmp_path):
+        pack = PackFile(tmp_path / "index.pack")
+        pack.add(b"old export")
+        pack.write_index()
+
+        pack = PackFile(tmp_path / "index.pack")
+        pack.add(b"<svg/>")
+        pack.write_index()
+
+        pack = PackFile(tmp_path / "index.pack")
+
+        assert b"<svg/>" == pack.path.read_bytes()
+        assert (0, 6) == pack.add(b"<svg/>")[:2]
+
+    def test_version_kept_while_appending(self, tmp_path):
+        pack = PackFile(tmp_path / "index.pack")
+        pack.add(b"<svg/>")
+        pack.write_index()
+        version = pack.version
+
+        pack = PackFile(tmp_path / "index.pack")
+        pack.add(b"<svg/>")
+        pack.add(b"[]")
+
+        assert version == pack.version
+
+    def test_version_changed_by_compaction(self, tmp_path):
+        pack = PackFile(tmp_path / "index.pack")
+        pack.add(b"old export")
+        pack.write_index()
+        version = pack.version
+
+        pack = PackFile(tmp_path / "index.pack")
+        pack.write_index()
+
+        assert version != PackFile(tmp_path / "index.pack").version
+
+    def test_version_changed_without_index(self, tmp_path):
+        pack = PackFile(tmp_path / "index.pack")
+        version = pack.version
+        pack.add(b"<svg/>")
+
+        assert version != PackFile(tmp_path / "index.pack").version
+
+
+class TestPackUri:
+    """Test pack file URI."""
+
+    def test_top_level_document(self):
+        assert "_static/cadquery-packs/index.pack?v=1" == pack_uri("index", "1")
+
+    def test_nested_document(self):
+        assert "../../_static/cadquery-packs/a/b/c.pack?v=1" == pack_uri("a/b/c", "1")
+
+
+class TestPackVtkExport:
+    """Test packing of VTK.js exports."""
+
+    def test_shapes_packed_as_segments(self, tmp_path):
+        app = SimpleNamespace(outdir=tmp_path)
+        vtk_json = json.dumps(
+            {
+                "bounds": [0, 1, 0, 1, 0, 1],
+                "parts": [{"hash": "a"}, {"hash": "b"}],
+                "shapes": ["<VTKFile/>", "<VTKFile />"],
+            }
+        )
+
+        payload = json.loads(pack_vtk_export(app, "guide/index", vtk_json))
+
+        assert "shapes" not in payload
+        assert payload["pack"].startswith(
+            "../_static/cadquery-packs/guide/index.pack?v="
+        )
+        assert [(0, 10), (10, 11)] == [
+            (part["segment"]["offset"], part["segment"]["length"])
+            for part in payload["parts"]
+        ]
@@ -0,0 +1,308 @@
+"""Test live preview."""
+
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+
+from sphinxcontrib.cadquery import cqgi, preview
+from sphinxcontrib.cadquery.preview import (
+    MANIFEST_NAME,
+    PreviewServer,
+    export_model,
+    local_origin,
+    register_model,
+    websocket_accept,
+    websocket_handshake,
+    websocket_text_frame,
+    write_manifest,
+)
+
+
+def handshake_request(**headers):
+    headers = {
+        "Host": "127.0.0.1:8765",
+        "Upgrade": "websocket",
+        "Connection": "Upgrade",
+        "Sec-WebSocket-Key": "dGhlIHNhbXBsZSBub25jZQ==",
+        "Origin": "http://127.0.0.1:8000",
+        **headers,
+    }
+    lines = [f"{name}: {value}" for name, value in headers.items() if value is not None]
+
+    return "\r\n".join(["GET / HTTP/1.1", *lines, "", ""])
+
+
+class TestWebSocket:
+    """Test WebSocket helpers."""
+
+    def test_accept(self):
+        """Test example handshake from RFC 6455."""
+        result = websocket_accept("dGhlIHNhbXBsZSBub25jZQ==")
+
+        assert "s3pPLMBiTxaQ9kYGzzhZRbK+xOo=" == result
+
+    def test_short_text_frame(self):
+        assert b"\x81\x05Hello" == websocket_text_frame("Hello")
+
+    def test_medium_text_frame(self):
+        frame = websocket_text_frame("a" * 200)
+
+        assert b"\x81\x7e\x00\xc8" == frame[:4]
+        assert 204 == len(frame)
+
+    def test_long_text_frame(self):
+        frame = websocket_text_frame("a" * 70000)
+
+        assert b"\x81\x7f" + (70000).to_bytes(8, "big") == frame[:10]
+
+
+class TestHandshake:
+    """Test WebSocket opening handshake validation."""
+
+    @pytest.mark.parametrize(
+        "origin",
+        [
+            "null",
+            "file://",
+            "http://localhost:8000",
+            "https://localhost",
+            "http://127.0.0.1:8000",
+            "http://[::1]:8000",
+        ],
+    )
+    def test_local_origin(self, origin):
+        assert local_origin(origin)
+
+    @pytest.mark.parametrize(
+        "origin",
+        [
+            None,
+            "",
+            "http://example.com",
+            "http://localhost.example.com",
+            "http://127.0.0.1.example.com:8000",
+            "ftp://localhost",
+        ],
+    )
+    def test_remote_origin(self, origin):
+        assert not local_origin(origin)
+
+    def test_accepted(self):
+        accepted, response = websocket_handshake(handshake_request())
+
+        assert accepted
+        assert response.startswith("HTTP/1.1 101 ")
+        assert "Sec-WebSocket-Accept: s3pPLMBiTxaQ9kYGzzhZRbK+xOo=\r\n" in response
+
+    def test_remote_origin_forbidden(self):
+        request = handshake_request(Origin="http://example.com")
+
+        accepted, response = websocket_handshake(request)
+
+        assert not accepted
+        assert response.startswith("HTTP/1.1 403 ")
+
+    @pytest.mark.parametrize(
+        "headers",
+        [
+            {"Upgrade": None},
+            {"Upgrade": "h2c"},
+            {"Sec-WebSocket-Key": None},
+            {"Sec-WebSocket-Key": ""},
+        ],
+    )
+    def test_bad_request(self, headers):
+        accepted, response = websocket_handshake(handshake_request(**headers))
+
+        assert not accepted
+        assert response.startswith("HTTP/1.1 400 ")
+
+    def test_not_get(self):
+        request = handshake_request().replace("GET", "POST", 1)
+
+        assert not websocket_handshake(request)[0]
+
+
+class TestModels:
+    """Test model registration and manifest."""
+
+    @staticmethod
+    def directive(enabled=True, docname="index"):
+        return SimpleNamespace(
+            config=SimpleNamespace(cadquery_live_preview=enabled),
+            env=SimpleNamespace(docname=docname),
+        )
+
+    def test_disabled(self, tmp_path):
+        directive = self.directive(enabled=False)
+
+        assert register_model(directive, "model", tmp_path / "box.step") is None
+        assert not hasattr(directive.env, "cadquery_preview_models")
+
+    def test_register(self, tmp_path):
+        directive = self.directive()
+
+        model_id = register_model(
+            directive, "script", tmp_path / "box.py", select="box", color=[1, 0, 0, 1]
+        )
+
+        assert {
+            "index": {
+                model_id: {
+                    "color": [1, 0, 0, 1],
+                    "kind": "script",
+                    "path": str(tmp_path / "box.py"),
+                    "select": "box",
+                }
+            }
+        } == directive.env.cadquery_preview_models
+
+    def test_model_id_depends_on_entry(self, tmp_path):
+        directive = self.directive()
+        path_name = tmp_path / "box.py"
+
+        first = register_model(directive, "script", path_name, select="a")
+        again = register_model(directive, "script", path_name, select="a")
+        other = register_model(directive, "script", path_name, select="b")
+
+        assert first == again
+        assert first != other
+
+    def write_manifest(self, tmp_path, exception=None):
+        directive = self.directive()
+        first = register_model(directive, "model", tmp_path / "a.step")
+        directive.env.docname = "other"
+        second = register_model(directive, "model", tmp_path / "b.step")
+        app = SimpleNamespace(
+            config=directive.config, env=directive.env, outdir=str(tmp_path)
+        )
+
+        write_manifest(app, exception)
+
+        return tmp_path / "_static" / MANIFEST_NAME, {first, second}
+
+    def test_write_manifest(self, tmp_path):
+        manifest_path, model_ids = self.write_manifest(tmp_path)
+
+        assert model_ids == set(json.loads(manifest_path.read_text())["models"])
+
+    def test_write_manifest_failed_build(self, tmp_path):
+        manifest_path, _ = self.write_manifest(tmp_path, Exception())
+
+        assert not manifest_path.exists()
+
+
+class TestExportModel:
+    """Test export of manifest entries."""
+
+    def test_model_file(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(preview, "import_model", lambda path_name: path_name.name)
+        monkeypatch.setattr(
+            preview.VtkJsonExporter,
+            "export_shape",
+            lambda shape, color: json.dumps([shape, color]),
+        )
+        entry = {"kind": "model", "path": str(tmp_path / "box.step"), "color": None}
+
+        assert '["box.step", null]' == export_model(entry)
+
+    def test_script_rebuilt(self, monkeypatch, tmp_path):
+        builds = []
+
+        def build(script_source):
+            builds.append(script_source)
+            return SimpleNamespace(source=script_source)
+
+        class Exporter:
+            def __init__(self, result, select):
+                self.result = result
+                self.select = select
+
+            def __call__(self, *, color):
+                return json.dumps([self.result.source, self.select, color])
+
+        monkeypatch.setattr(cqgi, "_build", build)
+        monkeypatch.setattr(preview, "VtkJsonExporter", Exporter)
+        path_name = tmp_path / "box.py"
+        path_name.write_text("box = 1")
+        entry = {"kind": "script", "path": str(path_name), "select": "box"}
+
+        assert '["box = 1", "box", null]' == export_model({**entry, "color": None})
+        assert '["box = 1", "box", null]' == export_model({**entry, "color": None})
+        assert ["box = 1", "box = 1"] == builds
+
+
+class TestPreviewServer:
+    """Test rebuild of changed models."""
+
+    @pytest.fixture
+    def server(self, tmp_path):
+        model_path = tmp_path / "box.step"
+        model_path.write_text("")
+        manifest_path = tmp_path / "_static" / MANIFEST_NAME
+        manifest_path.parent.mkdir()
+        manifest_path.write_text(
+            json.dumps({"models": {"box": {"kind": "model", "path": str(model_path)}}})
+        )
+        server = PreviewServer(tmp_path, port=0)
+        server.pool = ThreadPoolExecutor(max_workers=1)
+        server.load_manifest()
+        yield server
+        server.pool.shutdown()
+
+    @staticmethod
+    def touch(server):
+        path_name = server.models["box"]["path"]
+        mtime = os.stat(path_name).st_mtime + 10
+        os.utime(path_name, (mtime, mtime))
+
+    def test_unchanged(self, server):
+        assert [] == server.changed_models()
+
+    def test_changed(self, server):
+        self.touch(server)
+
+        assert ["box"] == server.changed_models()
+
+    def test_changed_while_building(self, server):
+        self.touch(server)
+        server.building.add("box")
+
+        assert [] == server.changed_models()
+
+    def test_rebuild(self, monkeypatch, server):
+        messages = []
+
+        async def broadcast(message):
+            messages.append(json.loads(message))
+
+        monkeypatch.setattr(preview, "export_model", lambda entry: '{"parts":[]}')
+        monkeypatch.setattr(server, "broadcast", broadcast)
+        self.touch(server)
+        server.building.add("box")
+
+        asyncio.run(server.rebuild("box"))
+
+        assert [{"model": "box", "data": {"parts": []}}] == messages
+        assert [] == server.changed_models()
+        assert not server.building
+
+    def test_rebuild_error(self, monkeypatch, server):
+        messages = []
+
+        async def broadcast(message):
+            messages.append(json.loads(message))
+
+        def export_model(entry):
+            raise ValueError("bad model")
+
+        monkeypatch.setattr(preview, "export_model", export_model)
+        monkeypatch.setattr(server, "broadcast", broadcast)
+
+        asyncio.run(server.rebuild("box"))
+
+        assert [{"model": "box", "error": "bad model"}] == messages
@@ -0,0 +1,134 @@
+"""Test multi-view SVG drawings."""
+
+from concurrent.futures import Future
+
+import pytest
+
+from sphinxcontrib.cadquery import views
+from sphinxcontrib.cadquery.common import VIEWS
+from sphinxcontrib.cadquery.views import export_views, svg_sheet
+
+
+def svg(width, height):
+    return (
+        '<?xml version="1.0" encoding="UTF-8" standalone="no"?>\n'
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}">'
+        "</svg>"
+    )
+
+
+class TestSvgSheet:
+    """Test SVG sheet layout."""
+
+    def test_single_xml_declaration(self):
+        sheet = svg_sheet({"front": svg(100, 50), "top": svg(100, 50)})
+
+        assert 1 == sheet.count("<?xml")
+
+    def test_grid_size(self):
+        sheet = svg_sheet(
+            {"front": svg(100, 50), "top": svg(80, 40), "iso": svg(100, 50)}
+        )
+
+        assert 'width="200" height="148"' in sheet
+
+    def test_views_positioned_and_labelled(self):
+        sheet = svg_sheet({"front": svg(100, 50), "top": svg(100, 50)})
+
+        assert '<svg x="0" y="0"' in sheet
+        assert '<svg x="100" y="0"' in sheet
+        assert ">front</text>" in sheet
+        assert ">top</text>" in sheet
+
+
+class StubCache:
+    """Export cache holding documents in a dictionary."""
+
+    def __init__(self, documents=None):
+        self.documents = dict(documents or {})
+        self.set_views = []
+
+    def get(self, key_parts):
+        return self.documents.get(key_parts["view"])
+
+    def set(self, key_parts, value):
+        self.set_views.append(key_parts["view"])
+        self.documents[key_parts["view"]] = value
+
+
+class StubShape:
+    """Shape serialised as a BREP placeholder."""
+
+    def exportBrep(self, stream):
+        stream.write(b"brep")
+
+
+class StubPool:
+    """Executor running submitted calls immediately."""
+
+    def submit(self, fn, *args):
+        future = Future()
+        future.set_result(fn(*args))
+
+        return future
+
+
+class TestExportViews:
+    """Test export of cached views."""
+
+    @pytest.fixture(autouse=True)
+    def projections(self, monkeypatch):
+        projected = []
+
+        def project(brep, view):
+            projected.append(view)
+            return f"<svg>{view}</svg>"
+
+        def get_svg(shape, options):
+            view = next(k for k, v in VIEWS.items() if v == options["projectionDir"])
+            return project(b"brep", view)
+
+        monkeypatch.setattr(views, "project", project)
+        monkeypatch.setattr(views.exporters, "getSVG", get_svg, raising=False)
+        monkeypatch.setattr(views.SvgExporter, "to_compound", lambda shape: shape)
+        monkeypatch.setattr(views, "_pool", StubPool)
+
+        return projected
+
+    @pytest.fixture
+    def select_shape(self):
+        def select_shape():
+            select_shape.calls += 1
+            return StubShape()
+
+        select_shape.calls = 0
+
+        return select_shape
+
+    def test_all_cached(self, projections, select_shape):
+        cache = StubCache({"front": "front", "top": "top"})
+
+        documents = export_views(cache, {}, ("top", "front"), select_shape)
+
+        assert {"top": "top", "front": "front"} == documents
+        assert ["top", "front"] == list(documents)
+        assert 0 == select_shape.calls
+        assert [] == projections
+
+    @pytest.mark.parametrize(
+        "cached, missing",
+        [
+            ({"front": "front", "iso": "iso"}, ["top"]),
+            ({"front": "front"}, ["top", "iso"]),
+            ({}, ["front", "top", "iso"]),
+        ],
+    )
+    def test_only_missing_projected(self, projections, select_shape, cached, missing):
+        cache = StubCache(cached)
+
+        documents = export_views(cache, {}, ("front", "top", "iso"), select_shape)
+
+        assert 1 == select_shape.calls
+        assert missing == projections
+        assert missing == cache.set_views
+        assert ["front", "top", "iso"] == list(documents)